@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api_yamdb.db import check_connection_health
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+
+        from . import cache
+        from .metrics import install_query_recorder
+        from .slow_queries import install_slow_query_log
+
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(install_slow_query_log)
+        request_started.connect(check_connection_health)
+        # Кэш ответов и ETag сбрасываются при любой записи через ORM:
+        # из API, админки и management-команд.
+        for model, changed, deleted in (
+            (Category, cache.category_changed, cache.category_changed),
+            (Genre, cache.genre_changed, cache.genre_changed),
+            (Title, cache.title_changed, cache.title_deleted),
+            (Review, cache.review_changed, cache.review_changed),
+            (Comment, cache.comment_changed, cache.comment_changed),
+            (User, cache.user_changed, cache.user_changed),
+        ):
+            post_save.connect(changed, sender=model)
+            post_delete.connect(deleted, sender=model)
@@ -0,0 +1,19 @@
+from django.urls import re_path
+
+from .async_views import comment_list, review_list, title_detail, title_list
+
+# Маршруты чтения для ASGI. Они совпадают с маршрутами роутера
+# и проверяются раньше них; остальные запросы обслуживает api.urls.
+# Имена тоже как у роутера: по ним группируются метрики запросов.
+urlpatterns = [
+    re_path(r'^v1/titles/$', title_list, name='title-list'),
+    re_path(r'^v1/titles/(?P<pk>[^/.]+)/$', title_detail,
+            name='title-detail'),
+    re_path(r'^v1/titles/(?P<title_id>\d+)/reviews/$', review_list,
+            name='reviews-list'),
+    re_path(
+        r'^v1/titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments/$',
+        comment_list,
+        name='comments-list',
+    ),
+]
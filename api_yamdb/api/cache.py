@@ -0,0 +1,252 @@
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов, сгруппированных по ключу
+    (например, id произведения). У каждой группы есть номер версии:
+    инвалидация увеличивает его, и все страницы группы сразу
+    становятся недоступны без перебора ключей. Начальная версия
+    берётся из текущего времени, чтобы после вытеснения счётчика
+    из кэша не вернуться к уже использованному номеру.
+    Номер версии живёт API_CACHE['TIMEOUT'] секунд, как и страницы:
+    изменения в обход сигналов (QuerySet.update()) и сброс в другом
+    процессе при кэше в памяти процесса видны не позже этого срока.
+    """
+
+    def __init__(self, prefix, query_params=()):
+        self.prefix = prefix
+        self.query_params = query_params
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.API_CACHE['CACHE_ALIAS']]
+
+    @property
+    def version_timeout(self):
+        return settings.API_CACHE['TIMEOUT']
+
+    def version_key(self, group):
+        return f'{self.prefix}:{group}:version'
+
+    def version(self, group):
+        return self.cache.get_or_set(
+            self.version_key(group), time.time_ns, self.version_timeout
+        )
+
+    def make_key(self, group, request):
+        params = urlencode(sorted(
+            (name, request.query_params[name])
+            for name in self.query_params
+            if name in request.query_params
+        ))
+        return (f'{self.prefix}:{group}:{self.version(group)}:'
+                f'{request.get_host()}:{params}')
+
+    def count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        data = self.cache.get(key)
+        self.count(data is not None)
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, settings.API_CACHE['TIMEOUT'])
+
+    def invalidate(self, group):
+        """Сброс группы после фиксации текущей транзакции."""
+        def bump():
+            try:
+                self.cache.incr(self.version_key(group))
+            except ValueError:
+                self.cache.set(self.version_key(group), time.time_ns(),
+                               self.version_timeout)
+        transaction.on_commit(bump)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+review_pages = ResponseCache(
+    'reviews', ('page', 'page_size', 'pagination', 'cursor')
+)
+comment_pages = ResponseCache('comments')
+category_pages = ResponseCache('categories', ('page', 'search'))
+genre_pages = ResponseCache('genres', ('page', 'search'))
+title_pages = ResponseCache('titles')
+user_pages = ResponseCache('users')
+
+
+# Поля пользователя, которых нет в ответах API: вход по коду
+# подтверждения не сбрасывает кэш списка пользователей.
+USER_PRIVATE_FIELDS = frozenset(('last_login', 'confirmation_code'))
+
+
+def category_changed(sender, **kwargs):
+    """Название категории показывается и в произведениях."""
+    category_pages.invalidate('all')
+    title_pages.invalidate('all')
+
+
+def genre_changed(sender, **kwargs):
+    genre_pages.invalidate('all')
+    title_pages.invalidate('all')
+
+
+def title_changed(sender, instance, **kwargs):
+    title_pages.invalidate('all')
+
+
+def title_deleted(sender, instance, **kwargs):
+    review_pages.invalidate(instance.pk)
+    title_pages.invalidate('all')
+
+
+def review_changed(sender, instance, **kwargs):
+    """Отзыв меняет и страницы отзывов, и рейтинг произведения."""
+    review_pages.invalidate(instance.title_id)
+    title_pages.invalidate('all')
+
+
+def comment_changed(sender, instance, **kwargs):
+    comment_pages.invalidate(instance.review_id)
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= USER_PRIVATE_FIELDS:
+        return
+    user_pages.invalidate('all')
+
+
+def make_etag(*parts):
+    return quote_etag(
+        hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+    )
+
+
+class VersionedMixin:
+    """Версионируемая группа ResponseCache, к которой относится ViewSet."""
+
+    response_cache = None
+    cache_group = 'all'
+
+    def get_cache_group(self):
+        return self.cache_group
+
+
+class ConditionalListMixin(VersionedMixin):
+    """
+    ETag и ответ 304 для списка без сериализации объектов.
+    Валидатор собирается из адреса запроса, версии группы в кэше,
+    которая меняется по сигналам сохранения и удаления моделей, и агрегатов
+    count/max(id)/max(etag_date_field) по отфильтрованному queryset,
+    которые ловят вставку и удаление в обход API.
+    """
+
+    etag_date_field = None
+    etag_from_db = True
+
+    def get_etag(self, request, detail):
+        parts = [request.get_host(), request.get_full_path()]
+        if self.response_cache is not None:
+            parts.append(self.response_cache.version(self.get_cache_group()))
+        if self.etag_from_db:
+            queryset = self.filter_queryset(self.get_queryset()).order_by()
+            if detail:
+                lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+                queryset = queryset.filter(
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+            aggregates = {'count': Count('pk'), 'last_id': Max('pk')}
+            if self.etag_date_field:
+                aggregates['last_date'] = Max(self.etag_date_field)
+            parts.extend(queryset.aggregate(**aggregates).values())
+        return make_etag(*parts)
+
+    def conditional_response(self, handler, request, detail, *args,
+                             **kwargs):
+        etag = self.get_etag(request, detail)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, False, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ETag и ответ 304 для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, True, *args, **kwargs
+        )
+
+
+class CachedListMixin(VersionedMixin):
+    """
+    Отдаёт страницу списка из ResponseCache, если она там есть.
+    Вместе со страницей хранится её ETag: стоящий в MRO перед
+    ConditionalListMixin, миксин отвечает на попадание в кэш,
+    в том числе 304, без запросов к БД, а ETag из агрегатов
+    считается только при промахе.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = self.response_cache.make_key(self.get_cache_group(), request)
+        entry = self.response_cache.get(key)
+        if entry is not None:
+            data, etag = entry
+            headers = {'X-Cache': 'HIT'}
+            if etag is not None:
+                headers['ETag'] = etag
+                if etag in parse_etags(
+                        request.headers.get('If-None-Match', '')):
+                    return Response(status=status.HTTP_304_NOT_MODIFIED,
+                                    headers=headers)
+            return Response(data, headers=headers)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.response_cache.set(key, (response.data, response.get('ETag')))
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class GenerationCacheMixin(CachedListMixin, ConditionalListMixin):
+    """
+    Кэш списка справочника с общим счётчиком поколений:
+    любое сохранение или удаление объекта (через API, админку
+    или ORM) сбрасывает все страницы и результаты поиска разом —
+    поколение увеличивают сигналы post_save/post_delete модели
+    (category_changed, genre_changed). Поэтому ETag строится из поколения
+    без запросов к БД.
+    """
+
+    etag_from_db = False
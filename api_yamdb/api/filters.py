@@ -1,10 +1,25 @@
 from django_filters import rest_framework as filter
 
+from rest_framework.filters import BaseFilterBackend
+
 from reviews.models import Title
+from reviews.search import search_terms, search_titles
+
+
+GENRE_MATCH_ANY = 'any'
+GENRE_MATCH_ALL = 'all'
+
+
+def split_slugs(value):
+    return [slug for slug in value.split(',') if slug]
 
 
 class TitleFilter(filter.FilterSet):
-    """Фильтр по полям произведений."""
+    """
+    Фильтр по полям произведений. В genre можно передать
+    несколько slug через запятую: по умолчанию подходят
+    произведения любого из жанров, при genre_match=all — всех сразу.
+    """
 
     name = filter.CharFilter(
         field_name='name',
@@ -15,10 +30,47 @@ class TitleFilter(filter.FilterSet):
         lookup_expr='exact',
     )
     genre = filter.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='exact',
+        method='filter_genre',
+    )
+    genre_match = filter.ChoiceFilter(
+        choices=(
+            (GENRE_MATCH_ANY, GENRE_MATCH_ANY),
+            (GENRE_MATCH_ALL, GENRE_MATCH_ALL),
+        ),
+        method='filter_genre_match',
     )
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year')
+        fields = ('name', 'category', 'genre', 'genre_match', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        links = Title.genre.through.objects
+        slugs = split_slugs(value)
+        if self.form.cleaned_data.get('genre_match') == GENRE_MATCH_ALL:
+            for slug in slugs:
+                queryset = queryset.filter(pk__in=links.filter(
+                    genre__slug=slug
+                ).values('title_id'))
+            return queryset
+        return queryset.filter(pk__in=links.filter(
+            genre__slug__in=slugs
+        ).values('title_id'))
+
+    def filter_genre_match(self, queryset, name, value):
+        return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск произведений по параметру search
+    с сортировкой по релевантности.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not search_terms(query):
+            return queryset
+        return search_titles(queryset, query).order_by('-search_rank', '-id')
@@ -0,0 +1,92 @@
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Списки IN (%s, %s, ...) разной длины считаются одним запросом.
+PLACEHOLDERS = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+def log_files(path):
+    """Текущий журнал и его архивы после ротации, от старых к новым."""
+    path = Path(path)
+    backups = [file for file in path.parent.glob(f'{path.name}.*')
+               if file.suffix[1:].isdigit()]
+    backups.sort(key=lambda file: int(file.suffix[1:]), reverse=True)
+    return [file for file in (*backups, path) if file.exists()]
+
+
+def read_entries(files):
+    for file in files:
+        with open(file, encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class Group:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.queries = Counter()
+
+    def add(self, entry):
+        self.count += 1
+        self.total += entry['duration_ms']
+        self.max = max(self.max, entry['duration_ms'])
+        if entry.get('query'):
+            self.queries[urlencode(sorted(entry['query'].items()),
+                                   doseq=True)] += 1
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных SQL-запросов: самые затратные '
+            'запросы по суммарному времени с view, действием '
+            'и параметрами адреса, которые их вызвали.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG['PATH'],
+                            help='Путь к журналу (архивы читаются тоже).')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Количество строк сводки.')
+        parser.add_argument('--by', choices=('sql', 'view'), default='sql',
+                            help='Группировать по тексту SQL или по view.')
+
+    def group_key(self, entry, by):
+        view = '.'.join(filter(None, (entry.get('view'), entry.get('action'))))
+        if by == 'view':
+            return view or '-'
+        return (view or '-', PLACEHOLDERS.sub('%s, ...', entry['sql']))
+
+    def handle(self, *args, **options):
+        files = log_files(options['file'])
+        if not files:
+            self.stdout.write(f'Журнал {options["file"]} не найден.')
+            return
+        groups = {}
+        for entry in read_entries(files):
+            key = self.group_key(entry, options['by'])
+            groups.setdefault(key, Group()).add(entry)
+        ranked = sorted(groups.items(), key=lambda item: item[1].total,
+                        reverse=True)[:options['top']]
+        self.stdout.write(f'Групп медленных запросов: {len(groups)}')
+        for position, (key, group) in enumerate(ranked, 1):
+            view, sql = (key, None) if options['by'] == 'view' else key
+            self.stdout.write(
+                f'{position}. {view}: {group.count} раз, '
+                f'всего {group.total:.1f} мс, '
+                f'среднее {group.total / group.count:.1f} мс, '
+                f'макс {group.max:.1f} мс'
+            )
+            if sql is not None:
+                self.stdout.write(f'   {sql[:300]}')
+            for params, count in group.queries.most_common(3):
+                self.stdout.write(f'   ?{params} — {count}')
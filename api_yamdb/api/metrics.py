@@ -0,0 +1,341 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from users.outbox import outbox_stats
+
+from .cache import (
+    category_pages,
+    comment_pages,
+    genre_pages,
+    review_pages,
+    title_pages,
+    user_pages,
+)
+
+RESPONSE_CACHES = (
+    review_pages, comment_pages, category_pages, genre_pages, title_pages,
+    user_pages,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Метрики текущего запроса. Переменная контекста доходит и до потоков
+# sync_to_async, поэтому запросы асинхронных view тоже учитываются.
+current = ContextVar('api_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Стоимость одного запроса: SQL, сериализация и общее время."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'serializer_time',
+                 'serializing')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def server_timing(self, total):
+        return (f'db;desc="{self.queries} queries";'
+                f'dur={self.db_time * 1000:.2f}, '
+                f'serializer;dur={self.serializer_time * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}')
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Подключение учёта SQL к каждому новому соединению с БД."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializer_timer():
+    """Учёт времени сериализации; вложенные сериализаторы не суммируются."""
+    metrics = current.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        metrics.serializing = False
+
+
+_timed_serializers = {}
+
+
+def timed_serializer(serializer_class):
+    """Подкласс сериализатора, который учитывает время вывода объектов."""
+    timed = _timed_serializers.get(serializer_class)
+    if timed is None:
+        def to_representation(self, instance):
+            with serializer_timer():
+                return super(timed, self).to_representation(instance)
+
+        timed = type(serializer_class.__name__, (serializer_class,), {
+            '__module__': serializer_class.__module__,
+            'to_representation': to_representation,
+        })
+        _timed_serializers[serializer_class] = timed
+    return timed
+
+
+class SerializerTimingMixin:
+    """Время сериализации ответа ViewSet попадает в метрики запроса."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = timed_serializer(self.get_serializer_class())
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class RouteStats:
+
+    __slots__ = ('statuses', 'buckets', 'count', 'total', 'db_time',
+                 'serializer_time', 'queries')
+
+    def __init__(self, size):
+        self.statuses = {}
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.queries = 0
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики запросов в памяти процесса по маршрутам:
+    число ответов по статусам, гистограмма длительности, время SQL
+    и сериализации, число SQL-запросов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, method, status, metrics, total):
+        buckets = settings.API_METRICS['BUCKETS']
+        with self._lock:
+            stats = self.routes.get((route, method))
+            if stats is None:
+                stats = self.routes[route, method] = RouteStats(len(buckets))
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            for position, bound in enumerate(buckets):
+                if total <= bound:
+                    stats.buckets[position] += 1
+                    break
+            stats.count += 1
+            stats.total += total
+            stats.db_time += metrics.db_time
+            stats.serializer_time += metrics.serializer_time
+            stats.queries += metrics.queries
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        buckets = settings.API_METRICS['BUCKETS']
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP yamdb_http_requests_total Ответы API по статусам.',
+                '# TYPE yamdb_http_requests_total counter',
+            ]
+            for (route, method), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    labels = format_labels(route=route, method=method,
+                                           status=status)
+                    lines.append(f'yamdb_http_requests_total{labels} {count}')
+            lines += [
+                '# HELP yamdb_http_request_duration_seconds '
+                'Длительность обработки запроса.',
+                '# TYPE yamdb_http_request_duration_seconds histogram',
+            ]
+            for (route, method), stats in routes:
+                cumulative = 0
+                for bound, count in zip(buckets, stats.buckets):
+                    cumulative += count
+                    labels = format_labels(route=route, method=method,
+                                           le=bound)
+                    lines.append(
+                        f'yamdb_http_request_duration_seconds_bucket'
+                        f'{labels} {cumulative}'
+                    )
+                labels = format_labels(route=route, method=method, le='+Inf')
+                lines.append(f'yamdb_http_request_duration_seconds_bucket'
+                             f'{labels} {stats.count}')
+                labels = format_labels(route=route, method=method)
+                lines.append(f'yamdb_http_request_duration_seconds_sum'
+                             f'{labels} {stats.total}')
+                lines.append(f'yamdb_http_request_duration_seconds_count'
+                             f'{labels} {stats.count}')
+            for name, attribute, description in (
+                ('yamdb_http_request_db_seconds_total', 'db_time',
+                 'Время SQL-запросов.'),
+                ('yamdb_http_request_queries_total', 'queries',
+                 'Число SQL-запросов.'),
+                ('yamdb_http_request_serializer_seconds_total',
+                 'serializer_time', 'Время сериализации ответов.'),
+            ):
+                lines += [f'# HELP {name} {description}',
+                          f'# TYPE {name} counter']
+                for (route, method), stats in routes:
+                    labels = format_labels(route=route, method=method)
+                    lines.append(
+                        f'{name}{labels} {getattr(stats, attribute)}'
+                    )
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+def format_labels(**labels):
+    def escape(value):
+        return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+                .replace('\n', '\\n'))
+    return '{%s}' % ','.join(
+        f'{name}="{escape(value)}"' for name, value in labels.items()
+    )
+
+
+def route_name(request):
+    """Имя маршрута вида titles-list или шаблон адреса без имени."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Число и время SQL-запросов, время сериализации и общее время
+    каждого запроса. Складываются в registry по маршрутам и, если
+    включено API_METRICS['SERVER_TIMING'], отдаются клиенту
+    в заголовке Server-Timing. На запрос приходится несколько
+    вызовов perf_counter и по одной записи в счётчики под блокировкой.
+    Под ASGI middleware работает асинхронно и не переводит цепочку
+    в общий синхронный поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Отметка, по которой Django 3.2 распознаёт асинхронный
+            # экземпляр middleware, как у MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.API_METRICS['ENABLED']:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.process_response(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.API_METRICS['ENABLED']:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.process_response(request, response, metrics)
+
+    def process_response(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        registry.record(route_name(request), request.method,
+                        response.status_code, metrics, total)
+        if settings.API_METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+
+def cache_lines():
+    lines = [
+        '# HELP yamdb_response_cache_requests_total '
+        'Обращения к кэшу ответов API.',
+        '# TYPE yamdb_response_cache_requests_total counter',
+    ]
+    for response_cache in RESPONSE_CACHES:
+        stats = response_cache.stats()
+        for result in ('hits', 'misses'):
+            labels = format_labels(cache=response_cache.prefix,
+                                   result=result)
+            lines.append(f'yamdb_response_cache_requests_total{labels} '
+                         f'{stats[result]}')
+    return lines
+
+
+def outbox_lines():
+    stats = outbox_stats()
+    lines = []
+    for key, kind, description in (
+        ('queued', 'gauge', 'Письма в очереди.'),
+        ('dead', 'gauge', 'Письма, исчерпавшие попытки отправки.'),
+        ('sent', 'counter', 'Отправленные этим процессом письма.'),
+        ('failed', 'counter', 'Неудачные попытки отправки.'),
+        ('latency_p50', 'gauge', 'Медиана задержки доставки, с.'),
+        ('latency_max', 'gauge', 'Максимальная задержка доставки, с.'),
+    ):
+        if key not in stats:
+            continue
+        name = f'yamdb_email_outbox_{key}'
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}',
+                  f'{name} {stats[key]}']
+    return lines
+
+
+def metrics_view(request):
+    """
+    Метрики процесса для Prometheus. Эндпоинт включается
+    API_METRICS['ENDPOINT'], а с API_METRICS['TOKEN'] требует этот
+    токен в заголовке Authorization: адрес клиента за обратным
+    прокси ничего не говорит о том, откуда пришёл запрос.
+    """
+    options = settings.API_METRICS
+    if not options['ENDPOINT']:
+        raise Http404
+    if options['TOKEN'] and not constant_time_compare(
+            request.headers.get('Authorization', ''),
+            f'Bearer {options["TOKEN"]}'):
+        raise Http404
+    lines = registry.render() + cache_lines() + outbox_lines()
+    return HttpResponse('\n'.join(lines) + '\n', content_type=CONTENT_TYPE)
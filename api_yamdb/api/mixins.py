@@ -1,4 +1,6 @@
-from rest_framework import mixins, viewsets
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework import mixins, relations, serializers, viewsets
 
 
 class ListCreateDestroyViewSet(
@@ -8,3 +10,88 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+def plan_related(model, serializer, prefix=''):
+    """
+    Список связей для select_related и prefetch_related,
+    которые понадобятся сериализатору при выводе объектов model.
+    """
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        if not isinstance(field, (relations.RelatedField,
+                                  relations.ManyRelatedField,
+                                  serializers.BaseSerializer)):
+            continue
+        if (isinstance(field, relations.RelatedField)
+                and field.use_pk_only_optimization()):
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+        path = prefix + field.source
+        many = model_field.many_to_many or model_field.one_to_many
+        (prefetch if many else select).append(path)
+        nested = getattr(field, 'child', field)
+        if isinstance(nested, serializers.Serializer):
+            sub_select, sub_prefetch = plan_related(
+                model_field.related_model, nested, f'{path}__'
+            )
+            (prefetch if many else select).extend(sub_select)
+            prefetch.extend(sub_prefetch)
+    return select, prefetch
+
+
+class QueryPlanMixin:
+    """
+    Подбирает select_related и prefetch_related для queryset
+    по полям используемого сериализатора, чтобы вывод списка
+    не делал отдельных запросов на каждый объект.
+    """
+
+    _query_plans = {}
+
+    def get_query_plan(self, model, serializer_class):
+        key = (model, serializer_class)
+        if key not in self._query_plans:
+            self._query_plans[key] = plan_related(model, serializer_class())
+        return self._query_plans[key]
+
+    def apply_query_plan(self, queryset):
+        select, prefetch = self.get_query_plan(
+            queryset.model, self.get_serializer_class()
+        )
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+
+class LeanObjectMixin:
+    """
+    Для изменения и удаления объект читается одним запросом только
+    с полями из object_fields[action]: их хватает для проверки прав
+    по author_id, записи и ответа. Связь через '__' подгружается
+    в том же запросе. Прочие действия используют обычный queryset.
+    """
+
+    object_fields = {}
+
+    def get_object_fields(self):
+        return self.object_fields.get(self.action)
+
+    def lean_queryset(self, queryset):
+        fields = self.get_object_fields()
+        related = {name.split('__')[0] for name in fields if '__' in name}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*fields)
@@ -0,0 +1,48 @@
+from rest_framework import pagination
+
+
+class FeedCursorPagination(pagination.CursorPagination):
+    """Курсорная пагинация по дате публикации и id."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class FeedPagination(pagination.BasePagination):
+    """
+    Постраничная пагинация с переключением на курсорную по запросу.
+    По умолчанию ответ совпадает с PageNumberPagination; курсорный
+    режим включается параметром ?pagination=cursor или наличием ?cursor=
+    и не требует COUNT(*) и OFFSET при чтении глубоких страниц.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.page_number = pagination.PageNumberPagination()
+        self.cursor = FeedCursorPagination()
+        self.paginator = self.page_number
+
+    def is_cursor_request(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_request(request):
+            self.paginator = self.cursor
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_fields(self, view):
+        return self.page_number.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view)
@@ -1,5 +1,7 @@
 import re
 
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -7,8 +9,9 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import update_title_rating
 
-from users.models import User
+from users.models import User, email_lookup
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -58,7 +61,7 @@ class TitleSerializer(serializers.ModelSerializer):
 
 class ReadOnlyTitleSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField(
-        required=False
+        read_only=True,
     )
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
@@ -101,6 +104,28 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return attrs
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            review = super().create(validated_data)
+            update_title_rating(review.title_id, review.score, 1)
+        return review
+
+    def update(self, instance, validated_data):
+        if 'score' not in validated_data:
+            return super().update(instance, validated_data)
+        with transaction.atomic():
+            # Прежняя оценка читается под блокировкой строки: иначе два
+            # параллельных PATCH вычтут из суммы одну и ту же оценку.
+            old_score = Review.objects.select_for_update().filter(
+                pk=instance.pk
+            ).values_list('score', flat=True).get()
+            review = super().update(instance, validated_data)
+            if review.score != old_score:
+                update_title_rating(
+                    review.title_id, review.score - old_score, 0
+                )
+        return review
+
 
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer для комментария."""
@@ -137,7 +162,10 @@ class UserSerializer(serializers.ModelSerializer):
         lookup_field = 'username'
 
     def validate_email(self, value):
-        if value in User.objects.values_list('email', flat=True):
+        users = User.objects.filter(email_lookup(value))
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
             raise serializers.ValidationError('Указанный email используется')
         return value
 
@@ -163,15 +191,36 @@ class SignUpSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Имя me недоступно')
         if not re.findall(r'^[\w.\@\+\-]+', data['username']):
             raise serializers.ValidationError('Недопустимые символы в имени')
-        if (User.objects.filter(email=data['email']).exists()
-                and not User.objects.filter(username=data['username']).exists()):
+        # Пользователи с тем же именем или email загружаются одним запросом
+        # и переиспользуются в create().
+        self.existing_user = None
+        email_taken = False
+        for user in User.objects.filter(
+            Q(username=data['username']) | email_lookup(data['email'])
+        ):
+            if user.username == data['username']:
+                self.existing_user = user
+            else:
+                email_taken = True
+        if self.existing_user is None and email_taken:
             raise serializers.ValidationError('Email занят')
-        if User.objects.filter(username=data['username']).exists():
-            user = User.objects.get(username=data['username'])
-            if user.email != data['email']:
-                raise serializers.ValidationError('Email указан неверно')
+        if (self.existing_user is not None
+                and self.existing_user.email != data['email']):
+            raise serializers.ValidationError('Email указан неверно')
         return data
 
+    def create(self, validated_data):
+        """Пользователь, найденный при проверке, или новый."""
+        if self.existing_user is not None:
+            return self.existing_user
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            raise ValidationError(
+                'Пользователь с таким именем или email уже существует'
+            )
+
 
 class EmailVerificationSerializer(serializers.Serializer):
     """Serializer для верификации."""
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Запрос Django, во время которого выполняется SQL.
+current_request = ContextVar('api_slow_query_request', default=None)
+
+
+def describe_request(request):
+    """
+    ViewSet, действие и параметры адреса запроса: по ним видно,
+    какой фильтр (например, TitleFilter) породил медленный SQL.
+    Тело запроса не записывается.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(getattr(match, 'func', None), 'cls', None)
+    actions = getattr(getattr(match, 'func', None), 'actions', None) or {}
+    return {
+        'route': (match.url_name or match.route) if match else None,
+        'view': view_class.__name__ if view_class else None,
+        'action': actions.get(request.method.lower()),
+        'method': request.method,
+        'path': request.path,
+        'query': {
+            name: values[0] if len(values) == 1 else values
+            for name, values in request.GET.lists()
+        },
+    }
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Запись SQL дольше SLOW_QUERY_LOG['THRESHOLD'] секунд в журнал."""
+    threshold = settings.SLOW_QUERY_LOG['THRESHOLD']
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if duration >= threshold:
+            entry = {
+                'time': timezone.now().isoformat(),
+                'duration_ms': round(duration * 1000, 3),
+                'database': context['connection'].alias,
+                'sql': sql,
+                'many': many,
+            }
+            if settings.SLOW_QUERY_LOG['SQL_PARAMS'] and not many:
+                entry['params'] = params
+            request = current_request.get()
+            if request is not None:
+                entry.update(describe_request(request))
+            logger.warning(json.dumps(entry, ensure_ascii=False,
+                                      default=str))
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+class SlowQueryMiddleware:
+    """
+    Привязка медленных SQL-запросов к запросу API, который их вызвал.
+    Под ASGI работает асинхронно, как и MetricsMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
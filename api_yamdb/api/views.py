@@ -1,8 +1,6 @@
 from http import HTTPStatus
 
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
@@ -11,14 +9,40 @@ from rest_framework import filters, pagination, permissions, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.tokens import RefreshToken
-
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import rebuild_title_ratings, update_title_rating
+from reviews.title_index import title_index
 
 from users.models import User
-
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from users.outbox import queue_email
+from users.tokens import access_token_for, issue_code, redeem_code
+
+from .cache import (
+    CachedListMixin,
+    ConditionalGetMixin,
+    GenerationCacheMixin,
+    category_pages,
+    comment_pages,
+    genre_pages,
+    make_etag,
+    review_pages,
+    title_pages,
+    user_pages,
+)
+from .filters import (
+    GENRE_MATCH_ALL,
+    GENRE_MATCH_ANY,
+    TitleFilter,
+    TitleSearchFilter,
+    split_slugs,
+)
+from .metrics import SerializerTimingMixin
+from .mixins import (
+    LeanObjectMixin,
+    ListCreateDestroyViewSet,
+    QueryPlanMixin,
+)
+from .pagination import FeedPagination
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrModeratorOrAdmin
 from .serializers import (
     CategorySerializer,
@@ -33,7 +57,16 @@ from .serializers import (
 )
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+def invalidate_author_pages(user):
+    """Сброс кэша отзывов и комментариев, где показывается имя автора."""
+    for title_id in user.reviews.values_list('title_id', flat=True):
+        review_pages.invalidate(title_id)
+    for review_id in user.comments.values_list('review_id', flat=True):
+        comment_pages.invalidate(review_id)
+
+
+class CategoryViewSet(SerializerTimingMixin, GenerationCacheMixin,
+                      ListCreateDestroyViewSet):
     """ViewSet для категории."""
 
     queryset = Category.objects.all()
@@ -42,9 +75,11 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    response_cache = category_pages
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(SerializerTimingMixin, GenerationCacheMixin,
+                   ListCreateDestroyViewSet):
     """ViewSet для жанра."""
 
     queryset = Genre.objects.all()
@@ -53,55 +88,151 @@ class GenreViewSet(ListCreateDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    response_cache = genre_pages
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(SerializerTimingMixin, QueryPlanMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
     """ViewSet для произведения."""
 
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    ).order_by('-id')
+    queryset = Title.objects.all().order_by('-id')
     pagination_class = pagination.PageNumberPagination
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
+    response_cache = title_pages
+    index_params = {'genre', 'genre_match', 'category', 'page'}
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH',):
             return TitleSerializer
         return ReadOnlyTitleSerializer
 
+    def get_index_filter(self):
+        """
+        Параметры для title_index, если список фильтруется только
+        по жанрам и категории; иначе None и запрос идёт в БД.
+        """
+        params = self.request.query_params
+        if (self.action != 'list'
+                or not set(params) <= self.index_params
+                or not {'genre', 'category'} & set(params)
+                or params.get('genre_match', GENRE_MATCH_ANY)
+                not in (GENRE_MATCH_ANY, GENRE_MATCH_ALL)):
+            return None
+        return {
+            'genres': split_slugs(params.get('genre', '')),
+            'match_all': params.get('genre_match') == GENRE_MATCH_ALL,
+            'category': params.get('category') or None,
+        }
+
+    def get_etag(self, request, detail):
+        if detail or self.get_index_filter() is None:
+            return super().get_etag(request, detail)
+        return make_etag(
+            request.get_host(),
+            request.get_full_path(),
+            title_pages.version('all'),
+            title_index.shared_generation(),
+        )
+
+    def list(self, request, *args, **kwargs):
+        index_filter = self.get_index_filter()
+        if index_filter is None:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            self.indexed_list, request, False, index_filter
+        )
+
+    def indexed_list(self, request, index_filter):
+        """
+        Список по индексу жанров и категорий: id отбираются
+        в памяти, из БД читается только одна страница.
+        """
+        ids = title_index.lookup(**index_filter)[::-1]
+        page = self.paginate_queryset(ids)
+        titles = self.apply_query_plan(
+            Title.objects.filter(pk__in=page).order_by('-id')
+        )
+        serializer = self.get_serializer(titles, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(SerializerTimingMixin, QueryPlanMixin, LeanObjectMixin,
+                    CachedListMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     """ViewSet для отзыва."""
 
     serializer_class = ReviewSerializer
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = FeedPagination
     permission_classes = (IsAuthorOrModeratorOrAdmin,)
+    response_cache = review_pages
+    etag_date_field = 'pub_date'
+    object_fields = {
+        'update': ('title', 'author', 'text', 'score', 'pub_date',
+                   'author__username'),
+        'partial_update': ('title', 'author', 'text', 'score', 'pub_date',
+                           'author__username'),
+        'destroy': ('title', 'author', 'score'),
+    }
+
+    def get_cache_group(self):
+        return self.kwargs.get('title_id')
 
     def get_queryset(self):
         title_id = self.kwargs.get('title_id')
+        if self.get_object_fields():
+            # Отзыв ищется сразу по title_id: отдельная проверка
+            # произведения не нужна, 404 вернёт get_object().
+            return self.lean_queryset(Review.objects.filter(title_id=title_id))
         title = get_object_or_404(Title, pk=title_id)
-        review = title.reviews.all()
-        return review
+        return self.apply_query_plan(title.reviews.all())
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
         title = get_object_or_404(Title, pk=title_id)
         serializer.save(author=self.request.user, title=title)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            score = Review.objects.select_for_update().filter(
+                pk=instance.pk
+            ).values_list('score', flat=True).first()
+            instance.delete()
+            # Отзыв, уже удалённый параллельным запросом, рейтинг
+            # второй раз не уменьшает.
+            if score is not None:
+                update_title_rating(instance.title_id, -score, -1)
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(SerializerTimingMixin, QueryPlanMixin, LeanObjectMixin,
+                     ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet для комментария."""
 
     serializer_class = CommentSerializer
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = FeedPagination
     permission_classes = (IsAuthorOrModeratorOrAdmin,)
+    response_cache = comment_pages
+    etag_date_field = 'pub_date'
+    object_fields = {
+        'update': ('review', 'author', 'text', 'pub_date',
+                   'author__username'),
+        'partial_update': ('review', 'author', 'text', 'pub_date',
+                           'author__username'),
+        'destroy': ('review', 'author'),
+    }
+
+    def get_cache_group(self):
+        return self.kwargs.get('review_id')
 
     def get_queryset(self):
         review_id = self.kwargs.get('review_id')
+        if self.get_object_fields():
+            return self.lean_queryset(
+                Comment.objects.filter(review_id=review_id)
+            )
         review = get_object_or_404(Review, pk=review_id)
-        return review.comments.all()
+        return self.apply_query_plan(review.comments.all())
 
     def perform_create(self, serializer):
         review_id = self.kwargs.get('review_id')
@@ -109,7 +240,8 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, review=review)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, ConditionalGetMixin,
+                  viewsets.ModelViewSet):
     """ViewSet модели User."""
 
     queryset = User.objects.all()
@@ -119,16 +251,41 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     lookup_field = 'username'
     http_method_names = ('get', 'post', 'patch', 'delete')
+    response_cache = user_pages
+
+    def perform_update(self, serializer):
+        username = serializer.instance.username
+        serializer.save()
+        if serializer.instance.username != username:
+            invalidate_author_pages(serializer.instance)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            title_ids = list(instance.reviews.values_list('title_id',
+                                                          flat=True))
+            instance.delete()
+            rebuild_title_ratings(Title.objects.filter(pk__in=title_ids))
 
     @action(detail=False,
             methods=['GET', 'PATCH'],
             permission_classes=[permissions.IsAuthenticated, ])
     def me(self, request):
         """Получение данных своей учётной записи."""
-        me = request.user
+        if request.method == 'GET':
+            me = request.user
+            # Пользователь из токена с ролью содержит не все поля.
+            if me.get_deferred_fields() & set(UserSerializer.Meta.fields):
+                me = User.objects.get(pk=me.pk)
+            return Response(UserSerializer(me).data, status=HTTPStatus.OK)
+        # Пользователь из кэша аутентификации может быть устаревшим,
+        # а сохраняется он целиком.
+        me = User.objects.get(pk=request.user.pk)
+        username = me.username
         serializer = UserSerializer(me, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save(role=me.role)
+            if me.username != username:
+                invalidate_author_pages(me)
             return Response(serializer.data, status=HTTPStatus.OK)
         return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
 
@@ -142,19 +299,13 @@ def APISignUp(request):
     """
     serializer = SignUpSerializer(data=request.data)
     if serializer.is_valid():
-        email = serializer.validated_data['email']
-        username = serializer.validated_data['username']
-        user, created = User.objects.get_or_create(username=username,
-                                                   email=email)
-        confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        user = serializer.save()
+        confirmation_code = issue_code(user)
+        queue_email(
             'Confirmation code',
             f'Your confirmation code is: {confirmation_code}',
-            'noreply@example.com',
-            [email],
+            user.email,
         )
-        user.confirmation_code = confirmation_code
-        user.save()
         return Response(serializer.data, status=HTTPStatus.OK)
     return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
 
@@ -170,11 +321,8 @@ def GetJWTToken(request):
     if serializer.is_valid(raise_exception=True):
         data = serializer.validated_data
         user = get_object_or_404(User, username=data['username'])
-        if default_token_generator.check_token(user,
-                                               data['confirmation_code']):
-            user.confirmation_code = default_token_generator.make_token(user)
-            user.save()
-            token = RefreshToken.for_user(user).access_token
+        if redeem_code(user, data['confirmation_code']):
+            token = access_token_for(user)
             return Response({'token': str(token)}, status=HTTPStatus.CREATED)
         return Response(
             {'confirmation_code': 'Неверный код верификации!'},
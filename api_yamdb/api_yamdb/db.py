@@ -0,0 +1,69 @@
+from django.db import connections
+
+POSTGRESQL = 'django.db.backends.postgresql'
+SQLITE = 'django.db.backends.sqlite3'
+
+# Режимы внешнего пула соединений.
+POOLERS = ('', 'pgbouncer')
+
+
+def env_bool(environ, name, default=False):
+    value = environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_settings(environ, base_dir):
+    """
+    Настройки БД по умолчанию из переменных окружения.
+    Без DB_ENGINE используется SQLite, как в тестах и при разработке;
+    с DB_ENGINE=django.db.backends.postgresql — PostgreSQL
+    с постоянными соединениями (DB_CONN_MAX_AGE секунд), проверкой
+    соединения перед запросом и, при DB_POOLER=pgbouncer, работой
+    через PgBouncer в режиме transaction.
+    """
+    engine = environ.get('DB_ENGINE', SQLITE)
+    pooler = environ.get('DB_POOLER', '')
+    if pooler not in POOLERS:
+        raise ValueError(f'DB_POOLER: неизвестный пул соединений {pooler!r}')
+    if engine != POSTGRESQL:
+        return {
+            'ENGINE': engine,
+            'NAME': environ.get('DB_NAME', base_dir / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 0)),
+        }
+    return {
+        'ENGINE': engine,
+        'NAME': environ.get('DB_NAME', 'postgres'),
+        'USER': environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', 'localhost'),
+        'PORT': environ.get('DB_PORT', '6432' if pooler else '5432'),
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': env_bool(environ, 'DB_CONN_HEALTH_CHECKS',
+                                       True),
+        # В режиме transaction PgBouncer отдаёт соединение сервера другому
+        # клиенту после транзакции, и серверный курсор .iterator()
+        # за её пределами не живёт.
+        'DISABLE_SERVER_SIDE_CURSORS': bool(pooler),
+        'OPTIONS': {
+            'connect_timeout': int(environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+
+
+def check_connection_health(**kwargs):
+    """
+    Проверка постоянных соединений в начале запроса: соединение,
+    оборванное сервером или пулом за время простоя, закрывается,
+    и запрос открывает новое вместо ошибки на первом SQL.
+    Включается ключом CONN_HEALTH_CHECKS в настройках БД.
+    """
+    for connection in connections.all():
+        if (not connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                or connection.connection is None
+                or connection.in_atomic_block):
+            continue
+        if not connection.is_usable():
+            connection.close()
@@ -1,7 +1,10 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
+from .db import database_settings, env_bool
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -30,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,6 +46,8 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+ASGI_URLCONF = 'api_yamdb.asgi_urls'
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
@@ -63,13 +70,82 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# SQLite по умолчанию; PostgreSQL и постоянные соединения задаются
+# переменными окружения DB_* (см. api_yamdb/db.py).
+
 DATABASES = {
+    'default': database_settings(os.environ, BASE_DIR),
+}
+
+# Cache
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+API_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+TITLE_INDEX_TTL = 300
+
+# Метрики запросов: заголовок Server-Timing и /metrics/ для Prometheus.
+API_METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    # Эндпоинт /metrics/ выключен по умолчанию. С TOKEN он отвечает
+    # только на запросы с заголовком Authorization: Bearer <TOKEN>.
+    'ENDPOINT': env_bool(os.environ, 'API_METRICS_ENDPOINT'),
+    'TOKEN': os.environ.get('API_METRICS_TOKEN', ''),
+    # Границы гистограммы длительности запросов, с.
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+}
+
+# Журнал медленных SQL-запросов в формате JSON lines с ротацией.
+# THRESHOLD — порог в секундах, None отключает журнал;
+# SQL_PARAMS — записывать ли значения параметров SQL;
+# PATH — файл журнала вне каталога проекта, по умолчанию во временном
+# каталоге, или из переменной окружения SLOW_QUERY_LOG_PATH.
+SLOW_QUERY_LOG = {
+    'THRESHOLD': 0.2,
+    'SQL_PARAMS': False,
+    'PATH': os.environ.get(
+        'SLOW_QUERY_LOG_PATH',
+        os.path.join(tempfile.gettempdir(), 'yamdb_slow_queries.jsonl'),
+    ),
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG['PATH'],
+            'maxBytes': SLOW_QUERY_LOG['MAX_BYTES'],
+            'backupCount': SLOW_QUERY_LOG['BACKUP_COUNT'],
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -109,7 +185,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -121,8 +197,40 @@ REST_FRAMEWORK = {
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
+    # Время жизни пользователя в кэше CachedJWTAuthentication, с;
+    # 0 — читать пользователя из БД на каждом запросе.
+    "USER_CACHE_TTL": 60,
+    # Роль и флаги пользователя в токене доступа: права проверяются
+    # без чтения пользователя из БД. Отзыв таких токенов хранится в кэше
+    # API_CACHE, поэтому нужен общий для процессов кэш (не LocMemCache).
+    "ROLE_CLAIMS": False,
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+DEFAULT_FROM_EMAIL = 'noreply@example.com'
+
+# Коды подтверждения (users/tokens.py). MODE: 'stateless' — код
+# проверяется по подписи без записи в БД при регистрации,
+# 'stored' — отпечаток кода ещё и хранится в users_user.confirmation_code.
+CONFIRMATION_CODE = {
+    'MODE': 'stateless',
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+# Очередь писем (users/outbox.py). WORKER: 'thread' — фоновый поток
+# в процессе приложения, 'command' — отдельный процесс
+# manage.py sendemails, 'eager' — отправка сразу после фиксации транзакции.
+EMAIL_OUTBOX = {
+    'WORKER': 'thread',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 0.2,
+    'IDLE_TIMEOUT': 30,
+    'INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 2.0,
+    'BACKOFF_MAX': 300,
+    'LEASE': 60,
+}
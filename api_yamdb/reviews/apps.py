@@ -1,6 +1,36 @@
 from django.apps import AppConfig
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+)
+
+
+def install_search(sender, using, **kwargs):
+    from django.db import connections
+
+    from .models import Title
+    from .search import install_search_index
+
+    tables = connections[using].introspection.table_names()
+    if Title._meta.db_table in tables:
+        install_search_index(using)
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from . import title_index
+        from .models import Category, Genre, Title
+
+        post_migrate.connect(install_search, sender=self)
+        post_save.connect(title_index.title_saved, sender=Title)
+        post_delete.connect(title_index.title_deleted, sender=Title)
+        m2m_changed.connect(title_index.title_genres_changed,
+                            sender=Title.genre.through)
+        for model in (Genre, Category):
+            post_save.connect(title_index.reference_changed, sender=model)
+            post_delete.connect(title_index.reference_changed, sender=model)
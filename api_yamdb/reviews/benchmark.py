@@ -0,0 +1,45 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Данные, созданные внутри блока, не сохраняются в БД."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(func, repeat):
+    """Время выполнения func в миллисекундах для каждого повтора."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summary(timings):
+    return (f'медиана {statistics.median(timings):.2f} мс, '
+            f'мин {min(timings):.2f} мс, макс {max(timings):.2f} мс')
+
+
+def percentiles(timings):
+    """p50, p95 и p99 в миллисекундах."""
+    if len(timings) < 2:
+        value = round(timings[0], 3) if timings else None
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {'p50': round(cuts[49], 3), 'p95': round(cuts[94], 3),
+            'p99': round(cuts[98], 3)}
@@ -0,0 +1,265 @@
+import json
+import random
+import statistics
+import time
+import uuid
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+
+from reviews import synthetic
+from reviews.benchmark import percentiles
+from users.tokens import access_token_for
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def titles_page(dataset, generator):
+    return 'anonymous', 'get', f'{TITLES_URL}?page={generator.randint(1, 5)}'
+
+
+def titles_filter(dataset, generator):
+    title = dataset.popular_title(generator)
+    if generator.random() < 0.5:
+        genre = title.genre.values_list('slug', flat=True).first()
+        return 'anonymous', 'get', f'{TITLES_URL}?genre={genre}'
+    return 'anonymous', 'get', f'{TITLES_URL}?year={title.year}'
+
+
+def titles_search(dataset, generator):
+    title = dataset.popular_title(generator)
+    return 'anonymous', 'get', f'{TITLES_URL}?search={title.name}'
+
+
+def title_detail(dataset, generator):
+    title = dataset.popular_title(generator)
+    return 'anonymous', 'get', f'{TITLES_URL}{title.id}/'
+
+
+def reviews_list(dataset, generator):
+    title = dataset.popular_title(generator)
+    return 'anonymous', 'get', f'{TITLES_URL}{title.id}/reviews/'
+
+
+def comments_list(dataset, generator):
+    review = dataset.popular_review(generator)
+    return ('anonymous', 'get',
+            f'{TITLES_URL}{review.title_id}/reviews/{review.id}/comments/')
+
+
+def users_me(dataset, generator):
+    return generator.choice(dataset.users), 'get', '/api/v1/users/me/'
+
+
+def comment_create(dataset, generator):
+    review = dataset.popular_review(generator)
+    return (generator.choice(dataset.users), 'post',
+            f'{TITLES_URL}{review.title_id}/reviews/{review.id}/comments/',
+            {'text': 'Новый комментарий'})
+
+
+def review_update(dataset, generator):
+    review = dataset.popular_review(generator)
+    return (review.author, 'patch',
+            f'{TITLES_URL}{review.title_id}/reviews/{review.id}/',
+            {'score': generator.randint(1, 10)})
+
+
+SCENARIOS = {
+    'titles-page': titles_page,
+    'titles-filter': titles_filter,
+    'titles-search': titles_search,
+    'title-detail': title_detail,
+    'reviews-list': reviews_list,
+    'comments-list': comments_list,
+    'users-me': users_me,
+    'comment-create': comment_create,
+    'review-update': review_update,
+}
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Воспроизводимый замер API на синтетических данных: '
+            'сценарии запросов через URLconf проекта, результат '
+            '(p50/p95/p99, запросы к БД, запросов в секунду) в JSON. '
+            'Замер идёт на временной БД, как у тестов (test_<NAME>), '
+            'которая удаляется после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--titles', type=int, default=2000)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения Ципфа.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Замеряемых запросов в каждом сценарии.')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='Запросов для прогрева перед замером.')
+        parser.add_argument('--scenario', action='append',
+                            choices=sorted(SCENARIOS),
+                            help='Сценарий (можно несколько); '
+                                 'по умолчанию все.')
+        parser.add_argument('--output', help='Файл для результата JSON.')
+        parser.add_argument('--baseline',
+                            help='Прежний результат JSON для сравнения.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимый рост p95 относительно '
+                                 'baseline, доля.')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Замер на настроенной БД вместо '
+                                 'временной: синтетические данные '
+                                 'фиксируются в ней и удаляются после '
+                                 'замера.')
+
+    def request(self, clients, dataset, scenario, generator, counter):
+        user, method, url, *data = SCENARIOS[scenario](dataset, generator)
+        if user not in clients:
+            clients[user] = Client(
+                HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+            )
+        client = clients[user]
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = getattr(client, method)(
+                url, *data, content_type='application/json'
+            ) if data else getattr(client, method)(url)
+        return time.perf_counter() - started, response.status_code
+
+    def run_scenario(self, dataset, scenario, options):
+        generator = random.Random(f'{options["seed"]}-{scenario}')
+        clients = {'anonymous': Client()}
+        counter = QueryCounter()
+        for _ in range(options['warmup']):
+            self.request(clients, dataset, scenario, generator, counter)
+        counter.count = 0
+        timings, errors = [], 0
+        for _ in range(options['requests']):
+            duration, status = self.request(clients, dataset, scenario,
+                                            generator, counter)
+            timings.append(duration * 1000)
+            errors += status >= 400
+        return {
+            'requests': len(timings),
+            'errors': errors,
+            **{f'{name}_ms': value
+               for name, value in percentiles(timings).items()},
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries_per_request': round(counter.count / len(timings), 2),
+            'rps': round(len(timings) / (sum(timings) / 1000), 1),
+        }
+
+    def compare(self, result, baseline, tolerance):
+        regressions = []
+        for name, current in result['scenarios'].items():
+            previous = baseline.get('scenarios', {}).get(name)
+            if previous is None:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {previous["p95_ms"]} -> '
+                    f'{current["p95_ms"]} мс'
+                )
+            if (current['queries_per_request']
+                    > previous['queries_per_request']):
+                regressions.append(
+                    f'{name}: запросов к БД {previous["queries_per_request"]}'
+                    f' -> {current["queries_per_request"]}'
+                )
+        return regressions
+
+    def measure(self, scenarios, options, dataset_options):
+        # Данные фиксируются, как в работающем сервисе: сброс кэша
+        # ответов и индекса произведений выполняется после фиксации
+        # транзакции и входит в стоимость сценариев записи.
+        dataset = synthetic.generate(exponent=options['zipf'],
+                                     **dataset_options)
+        return {
+            scenario: self.run_scenario(dataset, scenario, options)
+            for scenario in scenarios
+        }
+
+    def measure_current_db(self, scenarios, options, dataset_options):
+        """
+        Замер на настроенной БД: остатки прерванного запуска
+        удаляются перед генерацией, данные замера — после него.
+        """
+        synthetic.cleanup()
+        try:
+            return self.measure(scenarios, options, dataset_options)
+        finally:
+            synthetic.cleanup()
+
+    def handle(self, *args, **options):
+        dataset_options = {
+            name: options[name] for name in (
+                'users', 'titles', 'genres', 'categories', 'reviews',
+                'comments', 'seed',
+            )
+        }
+        scenarios = options['scenario'] or list(SCENARIOS)
+        result = {
+            'meta': {
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': {**dataset_options, 'zipf': options['zipf']},
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+            },
+            'scenarios': {},
+        }
+        # Страницы прошлых запусков и рабочие ключи не видны замеру:
+        # у ключей кэша на время замера свой префикс.
+        alias = settings.API_CACHE['CACHE_ALIAS']
+        benchmark_caches = {**settings.CACHES, alias: {
+            **settings.CACHES[alias],
+            'KEY_PREFIX': f'apibenchmark-{uuid.uuid4().hex}',
+        }}
+        with override_settings(CACHES=benchmark_caches):
+            if options['current_db']:
+                result['scenarios'] = self.measure_current_db(
+                    scenarios, options, dataset_options
+                )
+            else:
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    result['scenarios'] = self.measure(
+                        scenarios, options, dataset_options
+                    )
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            regressions = self.compare(result, baseline,
+                                       options['tolerance'])
+            if regressions:
+                raise CommandError('Регрессия производительности:\n'
+                                   + '\n'.join(regressions))
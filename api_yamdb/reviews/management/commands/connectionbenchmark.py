@@ -0,0 +1,82 @@
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from reviews.benchmark import summary
+
+from .servebenchmark import wsgi_get
+
+
+class ConnectionCounter:
+    """Число новых соединений с БД и имитация их установки."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.count = 0
+
+    def __call__(self, sender, connection, **kwargs):
+        # Для PostgreSQL установка соединения — это TCP, TLS
+        # и аутентификация, то есть несколько обменов с сервером.
+        time.sleep(self.latency)
+        self.count += 1
+
+
+class Command(BaseCommand):
+    help = ('Задержка запросов API с новым соединением с БД на каждый '
+            'запрос (CONN_MAX_AGE=0) и с постоянными соединениями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--url', default='/api/v1/titles/')
+        parser.add_argument('--max-age', type=int, default=600,
+                            help='CONN_MAX_AGE постоянных соединений, с.')
+        parser.add_argument('--connect-latency', type=float, default=0,
+                            help='Имитация установки соединения, мс; '
+                                 'для SQLite она почти бесплатна.')
+
+    def run(self, handler, path, query, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            status = wsgi_get(handler, path, query, 0)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                self.stderr.write(f'{path}: статус {status}')
+        return timings
+
+    def handle(self, *args, **options):
+        path, _, query = options['url'].partition('?')
+        handler = WSGIHandler()
+        counter = ConnectionCounter(options['connect_latency'] / 1000)
+        saved = {
+            key: connection.settings_dict.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')
+        }
+        runs = (
+            ('Новое соединение на запрос', 0, False),
+            ('Постоянные соединения', options['max_age'], False),
+            ('Постоянные соединения с проверкой', options['max_age'], True),
+        )
+        self.stdout.write(f'БД: {connection.vendor}, {options["url"]}')
+        connection_created.connect(counter)
+        try:
+            for name, max_age, health_checks in runs:
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                self.run(handler, path, query, options['warmup'])
+                counter.count = 0
+                timings = self.run(handler, path, query, options['requests'])
+                self.stdout.write(
+                    f'{name}: соединений {counter.count} '
+                    f'на {len(timings)} запросов'
+                )
+                self.stdout.write(f'  задержка: {summary(timings)}')
+        finally:
+            connection_created.disconnect(counter)
+            connection.close()
+            connection.settings_dict.update(saved)
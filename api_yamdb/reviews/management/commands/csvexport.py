@@ -0,0 +1,124 @@
+import csv
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from .csvimport import CSV_FILES
+
+BUFFER_SIZE = 1 << 16
+
+
+def to_csv(value):
+    """Значение поля в формате, который читает csvimport."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat(
+            timespec='milliseconds'
+        ).replace('+00:00', 'Z')
+    return value
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(f'{path}.gz', 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='',
+                buffering=BUFFER_SIZE)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает данные из БД в csv-файлы формата csvimport.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            required=True,
+            help='Каталог для csv-файлов; static/data/ с исходными '
+                 'данными проекта не перезаписывается по умолчанию.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Количество строк, читаемых из БД за один раз.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы в формат .gz.',
+        )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help='Выгружать файлы одновременно.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков в режиме --parallel.',
+        )
+
+    def export_file(self, spec, path, chunk_size, compress):
+        """
+        Выгрузка одной модели построчно: строки читаются из БД
+        серверным курсором порциями и сразу пишутся в файл,
+        поэтому расход памяти не зависит от размера таблицы.
+        """
+        attrs = list(spec['columns'])
+        rows = spec['model'].objects.order_by('pk').values_list(
+            *attrs
+        ).iterator(chunk_size=chunk_size)
+        count = 0
+        started = time.monotonic()
+        with open_output(os.path.join(path, spec['name']),
+                         compress) as csv_file:
+            writer = csv.writer(csv_file, delimiter=',')
+            writer.writerow(spec['columns'].values())
+            for row in rows:
+                writer.writerow([to_csv(value) for value in row])
+                count += 1
+        return count, time.monotonic() - started
+
+    def run_export(self, spec, path, chunk_size, compress):
+        """Выгрузка в отдельном потоке со своим соединением с БД."""
+        try:
+            return self.export_file(spec, path, chunk_size, compress)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        if options['gzip']:
+            # csvimport не выбирает между файлом и его копией .gz.
+            existing = [
+                spec['name'] for spec in CSV_FILES
+                if os.path.exists(os.path.join(options['path'], spec['name']))
+            ]
+            if existing:
+                raise CommandError(
+                    f'В каталоге {options["path"]} уже есть несжатые файлы: '
+                    f'{", ".join(existing)}. Выберите другой каталог '
+                    'или удалите их.'
+                )
+        os.makedirs(options['path'], exist_ok=True)
+        arguments = (options['path'], options['chunk_size'], options['gzip'])
+        if options['parallel']:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(
+                    lambda spec: self.run_export(spec, *arguments),
+                    CSV_FILES,
+                ))
+        else:
+            results = [
+                self.export_file(spec, *arguments) for spec in CSV_FILES
+            ]
+        for spec, (count, elapsed) in zip(CSV_FILES, results):
+            rate = count / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{spec["name"]}: выгружено {count} строк, {rate:.0f} строк/с'
+            )
@@ -1,103 +1,336 @@
 import csv
+import gzip
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.shortcuts import get_object_or_404
-
-from reviews.models import (
-    Category,
-    Comment,
-    Genre,
-    GenreTitle,
-    Review,
-    Title,
-)
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, Value, When
+from django.utils.dateparse import parse_datetime
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import rebuild_title_ratings
+from reviews.title_index import title_index
 
 from users.models import User
 
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static/data/')
+
+CSV_FILES = (
+    {
+        'name': 'users.csv',
+        'model': User,
+        'columns': {
+            'id': 'id',
+            'username': 'username',
+            'email': 'email',
+            'role': 'role',
+            'bio': 'bio',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+        },
+        'message': 'Пользователи из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'category.csv',
+        'model': Category,
+        'columns': {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        'message': 'Категории из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'genre.csv',
+        'model': Genre,
+        'columns': {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        'message': 'Жанры из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'titles.csv',
+        'model': Title,
+        'columns': {
+            'id': 'id',
+            'name': 'name',
+            'year': 'year',
+            'description': 'description',
+            'category_id': 'category',
+        },
+        'message': 'Произведения из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'genre_title.csv',
+        'model': Title.genre.through,
+        'columns': {
+            'id': 'id',
+            'title_id': 'title_id',
+            'genre_id': 'genre_id',
+        },
+        'message': 'Произведение-жанр из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'review.csv',
+        'model': Review,
+        'columns': {
+            'id': 'id',
+            'title_id': 'title_id',
+            'text': 'text',
+            'author_id': 'author',
+            'score': 'score',
+            'pub_date': 'pub_date',
+        },
+        'message': 'Отзывы из csv-файла добавлены в БД',
+    },
+    {
+        'name': 'comments.csv',
+        'model': Comment,
+        'columns': {
+            'id': 'id',
+            'review_id': 'review_id',
+            'text': 'text',
+            'author_id': 'author',
+            'pub_date': 'pub_date',
+        },
+        'message': 'Комментарии из csv-файла добавлены в БД',
+    },
+)
+
+
+def read_csv(path):
+    """
+    Построчное чтение csv-файла без загрузки его в память целиком.
+    Если файла нет, но есть его сжатая копия .gz, читается она.
+    """
+    compressed = os.path.exists(f'{path}.gz')
+    if compressed and os.path.exists(path):
+        raise CommandError(
+            f'Есть и {path}, и {path}.gz: неясно, какой из них загружать.'
+        )
+    if compressed:
+        csv_file = gzip.open(f'{path}.gz', 'rt', encoding='utf-8',
+                             newline='')
+    else:
+        csv_file = open(path, 'r', encoding='utf-8', newline='')
+    with csv_file:
+        yield from csv.DictReader(csv_file, delimiter=',')
+
+
+def foreign_keys(model, columns):
+    """Поля-внешние ключи модели среди загружаемых колонок."""
+    result = {}
+    for attr in columns:
+        field = model._meta.get_field(attr)
+        if field.many_to_one and attr == field.attname:
+            result[attr] = field.related_model
+    return result
+
+
+def convert(model, attr, value):
+    field = model._meta.get_field(attr)
+    if value == '' and field.null:
+        return None
+    if field.get_internal_type() == 'DateTimeField':
+        return parse_datetime(value)
+    return field.to_python(value)
+
+
+def dependencies(specs):
+    """
+    Граф зависимостей файлов по внешним ключам моделей:
+    файл загружается после файлов всех моделей, на которые ссылается.
+    """
+    by_model = {spec['model']: spec['name'] for spec in specs}
+    return {
+        spec['name']: {
+            by_model[related]
+            for related in foreign_keys(
+                spec['model'], spec['columns']
+            ).values()
+            if related in by_model and related is not spec['model']
+        }
+        for spec in specs
+    }
 
-def locations(name: str):
-    return csv.reader(open(os.path.join(
-        settings.BASE_DIR, 'static/data/', name), 'r', encoding='utf-8'),
-        delimiter=',')
+
+def critical_path(graph, timings):
+    """Цепочка зависимостей, завершившаяся позже всех."""
+    name = max(timings, key=lambda item: timings[item][1])
+    path = [name]
+    while graph[name]:
+        name = max(graph[name], key=lambda item: timings[item][1])
+        path.append(name)
+    return path[::-1]
+
+
+def insert_batch(model, batch):
+    """
+    Пакетная вставка с сохранением дат из файла: bulk_create
+    перезаписывает поля auto_now_add текущим временем, поэтому
+    они восстанавливаются одним UPDATE на пакет.
+    """
+    auto_fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    saved = {
+        field: [
+            When(pk=obj.pk, then=Value(getattr(obj, field.attname)))
+            for obj in batch if getattr(obj, field.attname) is not None
+        ]
+        for field in auto_fields
+    }
+    model.objects.bulk_create(batch)
+    for field, whens in saved.items():
+        if whens:
+            model.objects.filter(pk__in=[obj.pk for obj in batch]).update(
+                **{field.attname: Case(*whens, output_field=field)}
+            )
+
+
+def reset_sequences(model):
+    """Сдвиг последовательностей id после вставки с явными ключами."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из csv-файлов в БД пакетами.'
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DATA_DIR,
+            help='Каталог с csv-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help='Загружать независимые файлы одновременно.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков в режиме --parallel.',
+        )
 
-        csv = locations('users.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = User.objects.get_or_create(
-                id=row[0],
-                username=row[1],
-                email=row[2],
-                role=row[3],
-                bio=row[4],
-                first_name=row[5],
-                last_name=row[6])
-        self.stdout.write('Пользователи из csv-файла добавлены в БД')
-
-        csv = locations('category.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = Category.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                slug=row[2])
-        self.stdout.write('Категории из csv-файла добавлены в БД')
-
-        csv = locations('genre.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = Genre.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                slug=row[2])
-        self.stdout.write('Жанры из csv-файла добавлены в БД')
-
-        csv = locations('titles.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = (Title.objects.get_or_create(
-                id=row[0],
-                name=row[1],
-                year=row[2],
-                category=get_object_or_404(
-                    Category, id=row[3]
-                )))
-        self.stdout.write('Произведения из csv-файла добавлены в БД')
-
-        csv = locations('genre_title.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = (GenreTitle.objects.get_or_create(
-                id=row[0],
-                title=get_object_or_404(Title, id=row[1]),
-                genre=get_object_or_404(Genre, id=row[2])))
-        self.stdout.write('Произведение-жанр из csv-файла добавлены в БД')
-
-        csv = locations('review.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = (Review.objects.get_or_create(
-                id=row[0],
-                title=get_object_or_404(Title, id=row[1]),
-                text=row[2],
-                author=get_object_or_404(User, id=row[3]),
-                score=row[4],
-                pub_date=row[5]))
-        self.stdout.write('Отзывы из csv-файла добавлены в БД')
-
-        csv = locations('comments.csv')
-        next(csv, None)
-        for row in csv:
-            obj, created = (Comment.objects.get_or_create(
-                id=row[0],
-                review=get_object_or_404(Review, id=row[1]),
-                text=row[2],
-                author=get_object_or_404(User, id=row[3]),
-                pub_date=row[4]))
-        self.stdout.write('Комментарии из csv-файла добавлены в БД')
+    def load_file(self, spec, path, batch_size):
+        """
+        Загрузка одного csv-файла в одной транзакции.
+        Строки с уже существующим id или ссылкой на
+        отсутствующий объект пропускаются.
+        """
+        model, columns = spec['model'], spec['columns']
+        parents = {
+            attr: set(related.objects.values_list('pk', flat=True))
+            for attr, related in foreign_keys(model, columns).items()
+        }
+        existing = set(model.objects.values_list('pk', flat=True))
+        created = skipped = 0
+        started = time.monotonic()
+        with transaction.atomic():
+            batch = []
+            for row in read_csv(os.path.join(path, spec['name'])):
+                values = {
+                    attr: convert(model, attr, row.get(column) or '')
+                    for attr, column in columns.items()
+                }
+                if values['id'] in existing or any(
+                    values[attr] is not None and values[attr] not in ids
+                    for attr, ids in parents.items()
+                ):
+                    skipped += 1
+                    continue
+                existing.add(values['id'])
+                batch.append(model(**values))
+                if len(batch) >= batch_size:
+                    insert_batch(model, batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                insert_batch(model, batch)
+                created += len(batch)
+            reset_sequences(model)
+        elapsed = time.monotonic() - started
+        return created, skipped, elapsed
+
+    def report(self, spec, created, skipped, elapsed):
+        rate = (created + skipped) / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{spec["message"]}: добавлено {created}, '
+            f'пропущено {skipped}, {rate:.0f} строк/с'
+        )
+
+    def run_stage(self, spec, path, batch_size, started):
+        """Загрузка файла в отдельном потоке со своим соединением с БД."""
+        try:
+            begin = time.monotonic() - started
+            result = self.load_file(spec, path, batch_size)
+            return result, (begin, time.monotonic() - started)
+        finally:
+            connection.close()
+
+    def load_parallel(self, path, batch_size, workers):
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stdout.write(
+                'SQLite допускает только одного писателя: '
+                'файлы загружаются в одном потоке в порядке зависимостей'
+            )
+            workers = 1
+        specs = {spec['name']: spec for spec in CSV_FILES}
+        graph = dependencies(CSV_FILES)
+        pending = dict(graph)
+        running, timings = {}, {}
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name, parents in list(pending.items()):
+                    if parents <= timings.keys():
+                        del pending[name]
+                        running[pool.submit(
+                            self.run_stage, specs[name], path,
+                            batch_size, started,
+                        )] = name
+                if not running:
+                    raise CommandError(
+                        f'Циклическая зависимость: {", ".join(pending)}'
+                    )
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result, timings[name] = future.result()
+                    self.report(specs[name], *result)
+        for name, (begin, end) in sorted(
+                timings.items(), key=lambda item: item[1]):
+            self.stdout.write(f'{name}: {begin:.2f}–{end:.2f} с')
+        path = critical_path(graph, timings)
+        self.stdout.write(
+            f'Критический путь: {" → ".join(path)} '
+            f'({timings[path[-1]][1]:.2f} с)'
+        )
+
+    def handle(self, *args, **options):
+        if options['parallel']:
+            self.load_parallel(
+                options['path'], options['batch_size'], options['workers']
+            )
+        else:
+            for spec in CSV_FILES:
+                self.report(spec, *self.load_file(
+                    spec, options['path'], options['batch_size']
+                ))
+        rebuild_title_ratings()
+        title_index.invalidate()
+        # bulk_create не отправляет сигналы, поэтому кэшированные ответы
+        # API вместе с номерами версий и ETag сбрасываются целиком.
+        caches[settings.API_CACHE['CACHE_ALIAS']].clear()
+        self.stdout.write('Рейтинг произведений пересчитан')
@@ -0,0 +1,147 @@
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from reviews.benchmark import measure, rolled_back, summary
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+MARKER = 'explainbenchmark'
+
+
+def explain(sql):
+    """План запроса: строки EXPLAIN QUERY PLAN (SQLite) или EXPLAIN."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def plan_problems(line):
+    """Полный просмотр таблицы или сортировка без индекса в строке плана."""
+    problems = []
+    if connection.vendor == 'sqlite':
+        if (line.startswith('SCAN ') and ' USING ' not in line
+                and 'VIRTUAL TABLE' not in line):
+            problems.append('полный просмотр')
+        if 'TEMP B-TREE' in line:
+            problems.append('сортировка')
+    else:
+        if 'Seq Scan' in line:
+            problems.append('полный просмотр')
+        if line.lstrip(' ->').startswith('Sort '):
+            problems.append('сортировка')
+    return problems
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для SQL, который порождают запросы '
+            'к основным адресам API, и отмечает полные просмотры таблиц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=5000,
+                            help='Количество синтетических произведений.')
+        parser.add_argument('--reviews', type=int, default=5,
+                            help='Отзывов на каждое произведение.')
+        parser.add_argument('--comments', type=int, default=3,
+                            help='Комментариев на каждый отзыв.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество повторов каждого запроса.')
+
+    def generate(self, options, generator):
+        categories = [
+            Category.objects.create(name=f'{MARKER} {idx}',
+                                    slug=f'{MARKER}-{idx}')
+            for idx in range(10)
+        ]
+        genres = [
+            Genre.objects.create(name=f'{MARKER} {idx}',
+                                 slug=f'{MARKER}-{idx}')
+            for idx in range(10)
+        ]
+        User.objects.bulk_create(
+            User(username=f'{MARKER}-{idx}',
+                 email=f'{MARKER}-{idx}@yamdb.fake')
+            for idx in range(options['reviews'])
+        )
+        authors = list(User.objects.filter(username__startswith=MARKER))
+        Title.objects.bulk_create(
+            (Title(name=f'Произведение {idx}',
+                   year=generator.randint(1950, 2020),
+                   category=generator.choice(categories))
+             for idx in range(options['titles'])),
+            batch_size=1000,
+        )
+        titles = list(Title.objects.filter(category__in=categories))
+        Title.genre.through.objects.bulk_create(
+            (Title.genre.through(title=title, genre=genre)
+             for title in titles
+             for genre in generator.sample(genres, 2)),
+            batch_size=1000,
+        )
+        Review.objects.bulk_create(
+            (Review(title=title, author=author, text='Отзыв',
+                    score=generator.randint(1, 10))
+             for title in titles for author in authors),
+            batch_size=1000,
+        )
+        review = Review.objects.filter(title=titles[0]).first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors for _ in range(options['comments'])
+        )
+        return categories[0], titles[0], review
+
+    def endpoints(self, category, title, review):
+        base = '/api/v1/titles/'
+        return (
+            base,
+            f'{base}?year=2000',
+            f'{base}?category={category.slug}&year=2000',
+            f'{base}?genre={MARKER}-0&genre_match=all&name=1',
+            f'{base}?search=произведение',
+            f'{base}{title.id}/',
+            f'{base}{title.id}/reviews/',
+            f'{base}{title.id}/reviews/{review.id}/comments/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+        )
+
+    def handle(self, *args, **options):
+        self.cache = caches[settings.API_CACHE['CACHE_ALIAS']]
+        generator = random.Random(0)
+        client = Client()
+        flagged = 0
+        with rolled_back():
+            category, title, review = self.generate(options, generator)
+            for url in self.endpoints(category, title, review):
+                # Кэш ответов скрыл бы запросы к БД.
+                self.cache.clear()
+                with CaptureQueriesContext(connection) as context:
+                    status = client.get(url).status_code
+                self.stdout.write(f'{url} -> {status}')
+                for query in context.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT'):
+                        continue
+                    self.stdout.write(f'  {sql[:120]}')
+                    for line in explain(sql):
+                        problems = plan_problems(line)
+                        if problems:
+                            flagged += 1
+                            line = f'{line}  <- {", ".join(problems)}'
+                        self.stdout.write(f'    {line}')
+                timings = measure(
+                    lambda: (self.cache.clear(), client.get(url)),
+                    options['repeat'],
+                )
+                self.stdout.write(f'  время: {summary(timings)}')
+        self.stdout.write(f'Строк плана с полным просмотром или '
+                          f'сортировкой: {flagged}')
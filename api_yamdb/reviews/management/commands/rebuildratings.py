@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import title_pages
+from reviews.ratings import find_rating_drift, rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённый рейтинг произведений по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя.',
+        )
+
+    def handle(self, *args, **options):
+        drift = find_rating_drift()
+        if drift:
+            self.stdout.write(
+                f'Рейтинг расходится с отзывами у {len(drift)} '
+                f'произведений: {", ".join(map(str, drift[:20]))}'
+            )
+        else:
+            self.stdout.write('Расхождений рейтинга не найдено')
+        if options['check']:
+            if drift:
+                raise CommandError('Найдены расхождения рейтинга')
+            return
+        with transaction.atomic():
+            updated = rebuild_title_ratings()
+            # Рейтинг входит в ответы и ETag произведений.
+            title_pages.invalidate('all')
+        self.stdout.write(f'Рейтинг пересчитан для {updated} произведений')
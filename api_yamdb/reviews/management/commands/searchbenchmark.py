@@ -0,0 +1,76 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from reviews.benchmark import measure, rolled_back, summary
+from reviews.models import Title
+from reviews.search import search_titles
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'ер', 'жи', 'зо', 'ка', 'ле', 'ми', 'но', 'пу',
+    'ра', 'си', 'то', 'ул', 'фа', 'хо', 'це', 'ча', 'ша', 'ю', 'ян', 'ор',
+)
+
+
+def make_vocabulary(generator, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(generator.choices(SYLLABLES,
+                                            k=generator.randint(2, 4))))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает полнотекстовый поиск произведений '
+            'с фильтром name__contains на синтетических данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=20000,
+                            help='Количество синтетических произведений.')
+        parser.add_argument('--words', type=int, default=5000,
+                            help='Размер словаря синтетических текстов.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество повторов каждого запроса.')
+        parser.add_argument('--query', action='append',
+                            help='Поисковый запрос (можно несколько).')
+
+    def generate(self, count, vocabulary, generator):
+        Title.objects.bulk_create(
+            (Title(
+                name=' '.join(generator.sample(vocabulary, 3)).capitalize(),
+                description=' '.join(generator.choices(vocabulary, k=20)),
+                year=generator.randint(1900, 2020),
+            ) for _ in range(count)),
+            batch_size=1000,
+        )
+
+    def run_page(self, queryset):
+        """Та же работа, что и у списка произведений: COUNT и страница."""
+        queryset.count()
+        list(queryset[:5])
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        vocabulary = make_vocabulary(generator, options['words'])
+        queries = options['query'] or [
+            vocabulary[0], vocabulary[1][:3], f'{vocabulary[2]} ба',
+        ]
+        with rolled_back():
+            self.generate(options['titles'], vocabulary, generator)
+            self.stdout.write(
+                f'Произведений в БД: {Title.objects.count()}'
+            )
+            titles = Title.objects.order_by('-id')
+            for query in queries:
+                contains = measure(
+                    lambda: self.run_page(titles.filter(name__contains=query)),
+                    options['repeat'],
+                )
+                search = measure(
+                    lambda: self.run_page(search_titles(titles, query)
+                                          .order_by('-search_rank', '-id')),
+                    options['repeat'],
+                )
+                self.stdout.write(f'«{query}»')
+                self.stdout.write(f'  name__contains: {summary(contains)}')
+                self.stdout.write(f'  search:         {summary(search)}')
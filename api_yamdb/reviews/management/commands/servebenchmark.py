@@ -0,0 +1,219 @@
+import asyncio
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+
+from reviews.benchmark import summary
+from reviews.models import Category, Comment, Review, Title
+from users.models import User
+
+MARKER = 'servebenchmark'
+HOST = 'localhost'
+
+
+def wsgi_get(handler, path, query, delay):
+    """GET через WSGI; медленный клиент держит рабочий поток."""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': HOST,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    response = handler(environ, start_response)
+    try:
+        for _ in response:
+            time.sleep(delay)
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def asgi_get(application, path, query, delay):
+    """GET через ASGI; ожидание медленного клиента не занимает поток."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 0),
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        else:
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def add_latency(latency):
+    """Имитация сетевой задержки до БД на каждом запросе, как у PostgreSQL."""
+    def execute(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def connected(sender, connection, **kwargs):
+        # Обёртка живёт в объекте соединения и переживает переподключение.
+        if execute not in connection.execute_wrappers:
+            connection.execute_wrappers.append(execute)
+
+    return connected
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность чтения API '
+            'через WSGI (пул потоков) и ASGI (асинхронные view).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=200,
+                            help='Количество синтетических произведений.')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Количество запросов в каждом прогоне.')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Рабочие потоки WSGI-сервера.')
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Одновременные соединения ASGI-сервера.')
+        parser.add_argument('--client-delay', type=float, default=20,
+                            help='Задержка медленного клиента, мс.')
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help='Задержка каждого запроса к БД, мс.')
+
+    def generate(self, count, generator):
+        category = Category.objects.create(name=MARKER, slug=MARKER)
+        author = User.objects.create_user(
+            username=MARKER, email=f'{MARKER}@yamdb.fake'
+        )
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000, category=category)
+            for idx in range(count)
+        )
+        titles = list(Title.objects.filter(category=category))
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Отзыв',
+                   score=generator.randint(1, 10))
+            for title in titles
+        )
+        reviews = list(Review.objects.filter(title__in=titles))
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for review in reviews for _ in range(3)
+        )
+        return category, author, reviews
+
+    def cleanup(self, category, author):
+        Title.objects.filter(category=category).delete()
+        category.delete()
+        author.delete()
+
+    def make_requests(self, count, reviews, generator):
+        requests = []
+        for _ in range(count):
+            review = generator.choice(reviews)
+            title_url = f'/api/v1/titles/{review.title_id}/'
+            requests.append(generator.choice((
+                ('/api/v1/titles/', f'category={MARKER}'),
+                ('/api/v1/titles/', 'page=2'),
+                (title_url, ''),
+                (f'{title_url}reviews/', ''),
+                (f'{title_url}reviews/{review.id}/comments/', ''),
+            )))
+        return requests
+
+    def run_wsgi(self, requests, threads, delay):
+        handler = WSGIHandler()
+
+        def run(request, submitted):
+            status = wsgi_get(handler, *request, delay)
+            return status, (time.perf_counter() - submitted) * 1000
+
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [
+                executor.submit(run, request, time.perf_counter())
+                for request in requests
+            ]
+            return [future.result() for future in futures]
+
+    def run_asgi(self, requests, concurrency, delay, application):
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def run(request):
+                submitted = time.perf_counter()
+                async with semaphore:
+                    status = await asgi_get(application, *request, delay)
+                return status, (time.perf_counter() - submitted) * 1000
+
+            return await asyncio.gather(*map(run, requests))
+
+        return asyncio.run(run_all())
+
+    def report(self, name, results, elapsed):
+        errors = sum(status != 200 for status, _ in results)
+        self.stdout.write(
+            f'{name}: {len(results) / elapsed:.1f} запросов/с, '
+            f'ошибок {errors}'
+        )
+        self.stdout.write(
+            f'  задержка: {summary([timing for _, timing in results])}'
+        )
+
+    def handle(self, *args, **options):
+        from api_yamdb.asgi import application
+
+        generator = random.Random(0)
+        category, author, reviews = self.generate(options['titles'],
+                                                  generator)
+        try:
+            requests = self.make_requests(options['requests'], reviews,
+                                          generator)
+            delay = options['client_delay'] / 1000
+            latency = add_latency(options['db_latency'] / 1000)
+            if options['db_latency']:
+                connection_created.connect(latency)
+            runs = (
+                ('WSGI', lambda: self.run_wsgi(
+                    requests, options['threads'], delay
+                )),
+                ('ASGI, синхронные view', lambda: self.run_asgi(
+                    requests, options['concurrency'], delay, ASGIHandler()
+                )),
+                ('ASGI, асинхронное чтение', lambda: self.run_asgi(
+                    requests, options['concurrency'], delay, application
+                )),
+            )
+            for name, run in runs:
+                started = time.perf_counter()
+                results = run()
+                self.report(name, results, time.perf_counter() - started)
+        finally:
+            connection_created.disconnect(latency)
+            self.cleanup(category, author)
@@ -0,0 +1,105 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.filters import TitleFilter, split_slugs
+from reviews.benchmark import measure, rolled_back, summary
+from reviews.models import Category, Genre, Title
+from reviews.title_index import title_index
+
+PAGE_SIZE = 5
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает фильтр произведений по жанрам и категории '
+            'в БД с индексом title_index на синтетических данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100000,
+                            help='Количество синтетических произведений.')
+        parser.add_argument('--genres', type=int, default=30,
+                            help='Количество жанров.')
+        parser.add_argument('--categories', type=int, default=10,
+                            help='Количество категорий.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество повторов каждого запроса.')
+
+    def generate(self, options, generator):
+        genres = Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(options['genres'])
+        )
+        categories = Category.objects.bulk_create(
+            Category(name=f'Категория {idx}', slug=f'category-{idx}')
+            for idx in range(options['categories'])
+        )
+        genres = list(Genre.objects.filter(
+            slug__in=[genre.slug for genre in genres]
+        ))
+        categories = list(Category.objects.filter(
+            slug__in=[category.slug for category in categories]
+        ))
+        Title.objects.bulk_create(
+            (Title(
+                name=f'Произведение {idx}',
+                year=generator.randint(1900, 2020),
+                category=generator.choice(categories),
+            ) for idx in range(options['titles'])),
+            batch_size=1000,
+        )
+        links = Title.genre.through
+        # Частота жанров убывает, как у реального каталога.
+        weights = [1 / rank for rank in range(1, len(genres) + 1)]
+        links.objects.bulk_create(
+            (links(title_id=title_id, genre_id=genre.id)
+             for title_id in Title.objects.values_list('id', flat=True)
+             for genre in set(generator.choices(genres, weights, k=3))),
+            batch_size=1000,
+        )
+        return genres, categories
+
+    def database_page(self, params):
+        """Та же работа, что и у списка произведений: COUNT и страница."""
+        queryset = TitleFilter(params, Title.objects.order_by('-id')).qs
+        queryset.count()
+        list(queryset.values_list('id', flat=True)[:PAGE_SIZE])
+
+    def index_page(self, params):
+        ids = title_index.lookup(
+            genres=split_slugs(params.get('genre', '')),
+            match_all=params.get('genre_match') == 'all',
+            category=params.get('category'),
+        )[::-1]
+        list(Title.objects.filter(pk__in=ids[:PAGE_SIZE])
+             .values_list('id', flat=True))
+
+    def handle(self, *args, **options):
+        generator = random.Random(0)
+        with rolled_back():
+            genres, categories = self.generate(options, generator)
+            self.stdout.write(
+                f'Произведений в БД: {Title.objects.count()}'
+            )
+            started = time.perf_counter()
+            title_index.ensure_fresh()
+            self.stdout.write(
+                'Построение индекса: '
+                f'{(time.perf_counter() - started) * 1000:.2f} мс'
+            )
+            queries = (
+                {'genre': genres[0].slug},
+                {'genre': f'{genres[0].slug},{genres[-1].slug}'},
+                {'genre': f'{genres[0].slug},{genres[1].slug}',
+                 'genre_match': 'all'},
+                {'genre': genres[2].slug, 'category': categories[0].slug},
+            )
+            for params in queries:
+                database = measure(lambda: self.database_page(params),
+                                   options['repeat'])
+                index = measure(lambda: self.index_page(params),
+                                options['repeat'])
+                self.stdout.write(str(params))
+                self.stdout.write(f'  БД:     {summary(database)}')
+                self.stdout.write(f'  индекс: {summary(index)}')
+        title_index.invalidate()
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=models.OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(
+        review_count=Coalesce(
+            models.Subquery(
+                reviews.annotate(total=models.Count('pk')).values('total')
+            ),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        score_sum=Coalesce(
+            models.Subquery(
+                reviews.annotate(total=models.Sum('score')).values('total')
+            ),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        rating=models.Subquery(
+            reviews.annotate(avg=models.Avg('score')).values('avg'),
+            output_field=models.FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг произведения'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
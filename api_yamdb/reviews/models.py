@@ -79,11 +79,40 @@ class Title(models.Model):
         null=True,
         verbose_name='Категория произведения',
     )
+    rating = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг произведения',
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов',
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
 
     class Meta:
         ordering = ('-year',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Список произведений отсортирован по -id и фильтруется
+        # по категории и году или только по году: индексы отдают
+        # страницу без сортировки.
+        indexes = [
+            models.Index(
+                fields=['category', 'year', '-id'],
+                name='title_category_feed_idx',
+            ),
+            models.Index(
+                fields=['year', '-id'],
+                name='title_year_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -124,6 +153,12 @@ class Review(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_feed_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -164,6 +199,12 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -0,0 +1,82 @@
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Review, Title
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """
+    Инкрементальное обновление рейтинга произведения.
+    Выполняется одним UPDATE без чтения строки, поэтому
+    безопасно при конкурентной записи отзывов.
+    """
+    review_count = F('review_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        review_count=review_count,
+        score_sum=score_sum,
+        rating=Case(
+            When(review_count__lte=-count_delta, then=Value(None)),
+            default=Cast(score_sum, FloatField()) / review_count,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def rebuild_title_ratings(queryset=None):
+    """Пересчёт рейтинга произведений по всем отзывам с нуля."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return queryset.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+            output_field=IntegerField(),
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+            output_field=IntegerField(),
+        ),
+        rating=Subquery(
+            reviews.annotate(avg=Avg('score')).values('avg'),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def find_rating_drift(queryset=None):
+    """Произведения, у которых сохранённый рейтинг расходится с отзывами."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    titles = queryset.order_by().annotate(
+        actual_count=Count('reviews'),
+        actual_sum=Coalesce(Sum('reviews__score'), 0),
+    ).values_list(
+        'pk', 'review_count', 'score_sum', 'rating',
+        'actual_count', 'actual_sum',
+    )
+    drift = []
+    for pk, count, total, rating, actual_count, actual_sum in (
+            titles.iterator()):
+        expected = actual_sum / actual_count if actual_count else None
+        if (count != actual_count or total != actual_sum
+                or (rating is None) != (expected is None)
+                or (expected is not None and abs(rating - expected) > 1e-9)):
+            drift.append(pk)
+    return drift
@@ -0,0 +1,129 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+TABLE = Title._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+PG_INDEX = f'{TABLE}_search_idx'
+PG_VECTOR = (
+    "to_tsvector('simple', coalesce({table}name, '') || ' ' || "
+    "coalesce({table}description, ''))"
+)
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        f'AFTER INSERT ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        f'VALUES (new.id, new.name, new.description); END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        f'AFTER DELETE ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+        f"VALUES ('delete', old.id, old.name, old.description); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        f'AFTER UPDATE OF name, description ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+        f"VALUES ('delete', old.id, old.name, old.description); "
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        f'VALUES (new.id, new.name, new.description); END'
+    ),
+}
+
+
+def install_search_index(using='default'):
+    """
+    Создание полнотекстового индекса произведений, если его нет.
+    В SQLite это таблица FTS5 с внешним содержимым и триггеры,
+    которые синхронизируют её с reviews_title при любой записи.
+    SQLite теряет триггеры при пересоздании таблицы в миграциях,
+    поэтому функция вызывается и после каждого migrate.
+    В PostgreSQL это GIN-индекс по выражению tsvector.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                f"name, description, content='{TABLE}', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = set(SQLITE_TRIGGERS) - existing
+            for name in missing:
+                cursor.execute(
+                    f'CREATE TRIGGER {name} {SQLITE_TRIGGERS[name]}'
+                )
+            if missing:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+                )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {TABLE} '
+                f'USING GIN ({PG_VECTOR.format(table="")})'
+            )
+
+
+def drop_search_index(using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def search_terms(query):
+    """Слова поискового запроса без служебных символов FTS."""
+    return re.findall(r'\w+', query.lower())
+
+
+def search_titles(queryset, query):
+    """
+    Полнотекстовый поиск по названию и описанию произведений.
+    Каждое слово запроса ищется как префикс, все слова обязательны.
+    Результат аннотирован полем search_rank: чем больше, тем выше
+    релевантность. На прочих СУБД используется поиск подстроки.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        # Соединение с таблицей FTS5 вместо коррелированного подзапроса:
+        # MATCH выполняется один раз, а bm25 считается для найденных строк.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-bm25({FTS_TABLE})'},
+        )
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        vector = PG_VECTOR.format(table=f'{TABLE}.')
+        return queryset.filter(RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)",
+            (tsquery,),
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))",
+            (tsquery,),
+            output_field=FloatField(),
+        ))
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
@@ -0,0 +1,159 @@
+import random
+
+from users.models import User
+
+from .models import Category, Comment, Genre, Review, Title
+from .ratings import rebuild_title_ratings
+
+# Метка синтетических строк в начале username, email и slug. Имя
+# при регистрации начинается с буквы, цифры или .@+-, в email двоеточие
+# недопустимо, а slug состоит из [-a-zA-Z0-9_], поэтому ни регистрация,
+# ни API, ни админка таких строк не создают, и cleanup() их не заденет.
+TAG = ':synthetic'
+BATCH_SIZE = 1000
+
+
+def zipf_weights(count, exponent):
+    """Веса рангов 1..count по закону Ципфа: вес ранга r равен 1 / r^s."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def zipf_counts(total, count, exponent, limit=None):
+    """
+    Распределение total объектов по count владельцам по закону Ципфа:
+    первый владелец получает больше всех, хвост — по одному-два.
+    Доля сверх limit переходит к следующим владельцам.
+    """
+    weights = zipf_weights(count, exponent)
+    counts = [0] * count
+    remaining, weight_left = total, sum(weights)
+    for position, weight in enumerate(weights):
+        share = round(remaining * weight / weight_left)
+        if limit is not None:
+            share = min(share, limit)
+        counts[position] = share
+        remaining -= share
+        weight_left -= weight
+    return counts
+
+
+class Dataset:
+    """Сгенерированные объекты, к которым обращаются сценарии."""
+
+    def __init__(self, users, titles, reviews, title_weights,
+                 review_weights):
+        self.users = users
+        self.titles = titles
+        self.reviews = reviews
+        self.title_weights = title_weights
+        self.review_weights = review_weights
+
+    def popular_title(self, generator):
+        """Произведение, выбранное с вероятностью по его популярности."""
+        return generator.choices(self.titles, self.title_weights)[0]
+
+    def popular_review(self, generator):
+        return generator.choices(self.reviews, self.review_weights)[0]
+
+
+def cleanup():
+    """
+    Удаление синтетических данных по метке TAG вместе с отзывами
+    и комментариями, в том числе созданными сценариями замера.
+    """
+    Title.objects.filter(
+        category__slug__startswith=f'{TAG}-category-'
+    ).delete()
+    Category.objects.filter(slug__startswith=f'{TAG}-category-').delete()
+    Genre.objects.filter(slug__startswith=f'{TAG}-genre-').delete()
+    User.objects.filter(username__startswith=f'{TAG}-').delete()
+
+
+def generate(users=200, titles=2000, genres=20, categories=10,
+             reviews=20000, comments=20000, exponent=1.1, seed=0):
+    """
+    Синтетический каталог с реалистичным перекосом: число отзывов
+    на произведение и комментариев на отзыв распределено по Ципфу,
+    популярные произведения получают сотни отзывов, а большинство —
+    единицы. Один пользователь пишет не больше одного отзыва
+    на произведение, поэтому отзывов на произведение не больше users.
+    Рейтинги пересчитываются после вставки.
+    """
+    generator = random.Random(seed)
+    Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'{TAG}-category-{idx}')
+        for idx in range(categories)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'{TAG}-genre-{idx}')
+        for idx in range(genres)
+    )
+    genre_ids = list(Genre.objects.filter(
+        slug__startswith=f'{TAG}-genre-'
+    ).values_list('id', flat=True))
+    category_ids = list(Category.objects.filter(
+        slug__startswith=f'{TAG}-category-'
+    ).values_list('id', flat=True))
+    User.objects.bulk_create(
+        (User(username=f'{TAG}-{idx}', email=f'{TAG}-{idx}@yamdb.fake')
+         for idx in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    user_list = list(User.objects.filter(
+        username__startswith=f'{TAG}-'
+    ).order_by('id'))
+    Title.objects.bulk_create(
+        (Title(
+            name=f'Произведение {idx}',
+            description=f'Описание произведения {idx}',
+            year=generator.randint(1950, 2020),
+            category_id=generator.choice(category_ids),
+        ) for idx in range(titles)),
+        batch_size=BATCH_SIZE,
+    )
+    title_list = list(Title.objects.filter(
+        category_id__in=category_ids
+    ).order_by('id'))
+    Title.genre.through.objects.bulk_create(
+        (Title.genre.through(title_id=title.id, genre_id=genre_id)
+         for title in title_list
+         for genre_id in generator.sample(genre_ids, generator.randint(1, 3))),
+        batch_size=BATCH_SIZE,
+    )
+
+    # Ранги популярности перемешаны, чтобы они не совпадали с id.
+    ranked_titles = generator.sample(title_list, len(title_list))
+    review_counts = zipf_counts(reviews, len(ranked_titles), exponent,
+                                limit=len(user_list))
+    Review.objects.bulk_create(
+        (Review(
+            title_id=title.id,
+            author_id=author.id,
+            text=f'Отзыв на произведение {title.id}',
+            score=generator.randint(1, 10),
+        ) for title, count in zip(ranked_titles, review_counts)
+            for author in generator.sample(user_list, count)),
+        batch_size=BATCH_SIZE,
+    )
+    review_list = list(Review.objects.filter(
+        title__category_id__in=category_ids
+    ).order_by('id'))
+    ranked_reviews = generator.sample(review_list, len(review_list))
+    comment_counts = zipf_counts(comments, len(ranked_reviews), exponent)
+    Comment.objects.bulk_create(
+        (Comment(
+            review_id=review.id,
+            author_id=generator.choice(user_list).id,
+            text=f'Комментарий к отзыву {review.id}',
+        ) for review, count in zip(ranked_reviews, comment_counts)
+            for _ in range(count)),
+        batch_size=BATCH_SIZE,
+    )
+    rebuild_title_ratings(Title.objects.filter(category_id__in=category_ids))
+    return Dataset(
+        users=user_list,
+        titles=ranked_titles,
+        reviews=ranked_reviews,
+        title_weights=zipf_weights(len(ranked_titles), exponent),
+        review_weights=zipf_weights(len(ranked_reviews), exponent),
+    )
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Category, Genre, Title
+
+
+def intersect(first, second):
+    """Пересечение отсортированных списков поиском по большему из них."""
+    if len(first) > len(second):
+        first, second = second, first
+    result = []
+    position = 0
+    for value in first:
+        position = bisect_left(second, value, position)
+        if position == len(second):
+            break
+        if second[position] == value:
+            result.append(value)
+    return result
+
+
+def union(lists):
+    return sorted(set().union(*lists))
+
+
+def discard(values, value):
+    position = bisect_left(values, value)
+    if position < len(values) and values[position] == value:
+        del values[position]
+
+
+class TitleIndex:
+    """
+    Индекс произведений в памяти процесса: для каждого slug жанра
+    и категории хранится отсортированный список id произведений.
+    Фильтр по нескольким жанрам сводится к пересечению или
+    объединению списков, после чего из БД читается одна страница.
+
+    Изменения произведений и их жанров применяются к индексу
+    по сигналам после фиксации транзакции. Остальные процессы
+    узнают о них по счётчику поколений в кэше API_CACHE и
+    перестраивают индекс целиком, если этот кэш общий (Redis,
+    Memcached, файлы или БД). С LocMemCache по умолчанию счётчик
+    у каждого процесса свой, и, как и записи в обход ORM
+    (bulk_create, update, flush), изменения из других процессов
+    учитываются не позже чем через TITLE_INDEX_TTL секунд.
+    """
+
+    generation_key = 'title-index:generation'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self.generation = None
+        self.all_ids = []
+        self.genres = {}
+        self.categories = {}
+        self.title_genres = {}
+        self.title_category = {}
+        self.genre_slugs = {}
+        self.category_slugs = {}
+
+    @property
+    def cache(self):
+        return caches[settings.API_CACHE['CACHE_ALIAS']]
+
+    def shared_generation(self):
+        # Поколение живёт TITLE_INDEX_TTL секунд: после истечения все
+        # процессы получают новое значение и перестраивают индекс.
+        return self.cache.get_or_set(self.generation_key, time.time_ns,
+                                     settings.TITLE_INDEX_TTL)
+
+    def bump_generation(self):
+        try:
+            return self.cache.incr(self.generation_key)
+        except ValueError:
+            generation = time.time_ns()
+            self.cache.set(self.generation_key, generation,
+                           settings.TITLE_INDEX_TTL)
+            return generation
+
+    def build(self):
+        genre_slugs = dict(Genre.objects.values_list('id', 'slug'))
+        category_slugs = dict(Category.objects.values_list('id', 'slug'))
+        all_ids, title_category, categories = [], {}, {}
+        for title_id, category_id in Title.objects.order_by(
+                'id').values_list('id', 'category_id').iterator():
+            all_ids.append(title_id)
+            slug = category_slugs.get(category_id)
+            title_category[title_id] = slug
+            if slug is not None:
+                categories.setdefault(slug, []).append(title_id)
+        genres, title_genres = {}, {}
+        for title_id, genre_id in Title.genre.through.objects.order_by(
+                'title_id').values_list('title_id', 'genre_id').iterator():
+            slug = genre_slugs[genre_id]
+            genres.setdefault(slug, []).append(title_id)
+            title_genres.setdefault(title_id, set()).add(slug)
+        with self._lock:
+            self.all_ids = all_ids
+            self.genres = genres
+            self.categories = categories
+            self.title_genres = title_genres
+            self.title_category = title_category
+            self.genre_slugs = genre_slugs
+            self.category_slugs = category_slugs
+            self.built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        generation = self.shared_generation()
+        with self._lock:
+            if (self.built_at is not None
+                    and self.generation == generation
+                    and time.monotonic() - self.built_at
+                    < settings.TITLE_INDEX_TTL):
+                return
+            self.build()
+            self.generation = generation
+
+    def lookup(self, genres=(), match_all=False, category=None):
+        """Отсортированные по возрастанию id произведений по фильтру."""
+        self.ensure_fresh()
+        with self._lock:
+            lists = [self.genres.get(slug, []) for slug in genres]
+            if not lists:
+                result = self.all_ids
+            elif match_all:
+                result = min(lists, key=len)
+                for values in lists:
+                    result = intersect(result, values)
+            else:
+                result = union(lists)
+            if category is not None:
+                result = intersect(result, self.categories.get(category, []))
+            return list(result)
+
+    def apply(self, change, *args):
+        """
+        Применение изменения к индексу после фиксации транзакции.
+        Если между построением индекса и этим изменением поколение
+        увеличил другой процесс, его изменения в индексе отсутствуют,
+        и вместо применения индекс перестраивается целиком.
+        """
+        def run():
+            with self._lock:
+                previous = self.generation
+                generation = self.bump_generation()
+                if (self.built_at is not None and previous is not None
+                        and generation == previous + 1):
+                    change(*args)
+                    self.generation = generation
+                else:
+                    self.built_at = None
+        transaction.on_commit(run)
+
+    def save_title(self, title_id, category_id):
+        if category_id is not None and category_id not in self.category_slugs:
+            self.built_at = None
+            return
+        if title_id not in self.title_category:
+            insort(self.all_ids, title_id)
+        old = self.title_category.get(title_id)
+        new = self.category_slugs.get(category_id)
+        if old != new:
+            if old is not None:
+                discard(self.categories[old], title_id)
+            if new is not None:
+                insort(self.categories.setdefault(new, []), title_id)
+        self.title_category[title_id] = new
+
+    def delete_title(self, title_id):
+        discard(self.all_ids, title_id)
+        category = self.title_category.pop(title_id, None)
+        if category is not None:
+            discard(self.categories[category], title_id)
+        for slug in self.title_genres.pop(title_id, ()):
+            discard(self.genres[slug], title_id)
+
+    def add_genres(self, pairs):
+        if any(genre_id not in self.genre_slugs for _, genre_id in pairs):
+            self.built_at = None
+            return
+        for title_id, genre_id in pairs:
+            slug = self.genre_slugs[genre_id]
+            if slug not in self.title_genres.setdefault(title_id, set()):
+                self.title_genres[title_id].add(slug)
+                insort(self.genres.setdefault(slug, []), title_id)
+
+    def remove_genres(self, pairs):
+        for title_id, genre_id in pairs:
+            slug = self.genre_slugs.get(genre_id)
+            if slug in self.title_genres.get(title_id, ()):
+                self.title_genres[title_id].discard(slug)
+                discard(self.genres[slug], title_id)
+
+    def invalidate(self):
+        """Полная перестройка при следующем обращении во всех процессах."""
+        def run():
+            with self._lock:
+                self.built_at = None
+            self.bump_generation()
+        transaction.on_commit(run)
+
+
+title_index = TitleIndex()
+
+
+def title_saved(sender, instance, **kwargs):
+    title_index.apply(title_index.save_title, instance.pk,
+                      instance.category_id)
+
+
+def title_deleted(sender, instance, **kwargs):
+    title_index.apply(title_index.delete_title, instance.pk)
+
+
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action in ('pre_clear', 'post_clear') or not pk_set:
+        if action == 'pre_clear':
+            title_index.invalidate()
+        return
+    if reverse:
+        pairs = [(title_id, instance.pk) for title_id in pk_set]
+    else:
+        pairs = [(instance.pk, genre_id) for genre_id in pk_set]
+    if action == 'post_add':
+        title_index.apply(title_index.add_genres, pairs)
+    elif action == 'post_remove':
+        title_index.apply(title_index.remove_genres, pairs)
+
+
+def reference_changed(sender, **kwargs):
+    title_index.invalidate()
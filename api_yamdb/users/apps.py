@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .authentication import (
+            check_claims_cache,
+            forget_user,
+            user_claims_changed,
+            user_deleted,
+        )
+        from .models import User
+        from .outbox import start_worker
+
+        post_save.connect(forget_user, sender=User)
+        post_delete.connect(forget_user, sender=User)
+        post_save.connect(user_claims_changed, sender=User)
+        post_delete.connect(user_deleted, sender=User)
+        request_started.connect(start_worker)
+        if settings.SIMPLE_JWT.get('ROLE_CLAIMS'):
+            check_claims_cache()
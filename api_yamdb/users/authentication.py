@@ -0,0 +1,158 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Секреты в кэш не попадают: при обращении к ним поля догружаются из БД.
+CACHED_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname not in ('password', 'confirmation_code')
+)
+# Поля пользователя, собранного из утверждений токена; порядок как в модели.
+CLAIM_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname == api_settings.USER_ID_FIELD
+    or field.attname in User.TOKEN_FIELDS
+)
+CLAIMS_VERSION_CLAIM = 'claims_version'
+
+
+def user_cache():
+    return caches[settings.API_CACHE['CACHE_ALIAS']]
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(sender, instance, **kwargs):
+    """Сброс закэшированного пользователя при сохранении и удалении."""
+    user_cache().delete(user_cache_key(
+        getattr(instance, api_settings.USER_ID_FIELD)
+    ))
+
+
+def check_claims_cache():
+    """
+    Версия утверждений должна быть общей для всех процессов: иначе
+    отзыв токенов в процессе, сохранившем пользователя, не виден
+    остальным, и они до истечения токена доверяют прежней роли.
+    """
+    if isinstance(user_cache(), LocMemCache):
+        raise ImproperlyConfigured(
+            "SIMPLE_JWT['ROLE_CLAIMS'] требует общего для процессов кэша, "
+            f"а кэш {settings.API_CACHE['CACHE_ALIAS']!r} — LocMemCache."
+        )
+
+
+def claims_version_key(user_id):
+    return f'auth-claims:{user_id}'
+
+
+def claims_version(user_id):
+    """Версия утверждений пользователя, которая попадает в новые токены."""
+    return user_cache().get_or_set(
+        claims_version_key(user_id), time.time_ns, None
+    )
+
+
+def revoke_claims(user_id):
+    """Токены с прежней версией утверждений сверяются с БД."""
+    try:
+        user_cache().incr(claims_version_key(user_id))
+    except ValueError:
+        user_cache().set(claims_version_key(user_id), time.time_ns(), None)
+
+
+def user_claims_changed(sender, instance, created, **kwargs):
+    """Отзыв токенов с ролью, если изменились поля токена."""
+    fields = instance.token_fields()
+    loaded = getattr(instance, 'loaded_token_fields', {})
+    instance.loaded_token_fields = fields
+    if not created and any(
+        name not in loaded or loaded[name] != value
+        for name, value in fields.items()
+    ):
+        revoke_claims(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def user_deleted(sender, instance, **kwargs):
+    revoke_claims(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, который не читает пользователя из БД
+    на каждом запросе. Поля пользователя (роль, флаги и профиль,
+    кроме секретов) хранятся в кэше SIMPLE_JWT['USER_CACHE_TTL']
+    секунд и сбрасываются при любом User.save() и удалении.
+    Изменения в обход модели (QuerySet.update) видны не позже
+    чем через TTL. Для нескольких процессов нужен общий кэш.
+
+    Если токен выпущен с ролью (SIMPLE_JWT['ROLE_CLAIMS']), пользователь
+    собирается из утверждений токена без БД и кэша пользователей:
+    нужна только текущая версия утверждений. Её меняет сохранение
+    пользователя с другими username, ролью или флагами, и тогда токен
+    сверяется с пользователем из БД: при расхождении он отклоняется,
+    и нужно получить новый.
+    """
+
+    def get_user(self, validated_token):
+        if (settings.SIMPLE_JWT.get('ROLE_CLAIMS')
+                and CLAIMS_VERSION_CLAIM in validated_token):
+            return self.get_claims_user(validated_token)
+        return self.get_stored_user(validated_token)
+
+    def get_claims_user(self, validated_token):
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = user_cache().get(claims_version_key(user_id))
+        if validated_token[CLAIMS_VERSION_CLAIM] == version:
+            return User.from_db(DEFAULT_DB_ALIAS, CLAIM_FIELDS, [
+                user_id if name == api_settings.USER_ID_FIELD
+                else validated_token[name]
+                for name in CLAIM_FIELDS
+            ])
+        user = self.get_stored_user(validated_token)
+        if any(validated_token.get(name) != value
+               for name, value in user.token_fields().items()):
+            raise InvalidToken(
+                'Роль пользователя изменилась, получите новый токен.'
+            )
+        return user
+
+    def get_stored_user(self, validated_token):
+        ttl = settings.SIMPLE_JWT.get('USER_CACHE_TTL', 0)
+        if not ttl:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        key = user_cache_key(user_id)
+        values = user_cache().get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            user_cache().set(key, [
+                getattr(user, name) for name in CACHED_FIELDS
+            ], ttl)
+            return user
+        user = User.from_db(DEFAULT_DB_ALIAS, CACHED_FIELDS, values)
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        return user
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from reviews.benchmark import measure, rolled_back, summary
+from users.models import User, email_lookup
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает проверку занятости email перебором всех адресов '
+            'и запросом по индексу при растущем числе пользователей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000,
+                            help='Итоговое количество пользователей.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Количество повторов каждой проверки.')
+
+    def scan(self, email):
+        return email in User.objects.values_list('email', flat=True)
+
+    def lookup(self, email, exclude_pk):
+        return User.objects.filter(email_lookup(email)).exclude(
+            pk=exclude_pk
+        ).exists()
+
+    def add_users(self, start, stop):
+        User.objects.bulk_create(
+            (User(username=f'bench{idx}', email=f'bench{idx}@yamdb.fake')
+             for idx in range(start, stop)),
+            batch_size=5000,
+        )
+
+    def handle(self, *args, **options):
+        sizes = []
+        size = 1000
+        while size < options['users']:
+            sizes.append(size)
+            size *= 10
+        sizes.append(options['users'])
+        with rolled_back():
+            created = 0
+            for size in sizes:
+                self.add_users(created, size)
+                created = size
+                # Самый неудачный для перебора случай: адреса нет.
+                email = 'missing@yamdb.fake'
+                scan = measure(lambda: self.scan(email), options['repeat'])
+                lookup = measure(lambda: self.lookup(email, 1),
+                                 options['repeat'])
+                self.stdout.write(f'Пользователей: {User.objects.count()}')
+                self.stdout.write(f'  перебор: {summary(scan)}')
+                self.stdout.write(f'  индекс:  {summary(lookup)}')
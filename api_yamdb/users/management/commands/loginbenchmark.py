@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from reviews.benchmark import rolled_back
+from users.models import User
+from users.tokens import (
+    MODE_STATELESS,
+    MODE_STORED,
+    code_digest,
+    issue_code,
+    redeem_code,
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность выдачи кода и входа '
+            'по нему: прежний путь с user.save() и режимы '
+            "CONFIRMATION_CODE 'stored' и 'stateless'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000,
+                            help='Количество пользователей.')
+        parser.add_argument('--rounds', type=int, default=3,
+                            help='Сколько раз каждый пользователь входит.')
+
+    def legacy_login(self, username):
+        # Код длиннее поля confirmation_code, поэтому и здесь
+        # сохраняется его отпечаток, иначе PostgreSQL отклонит UPDATE.
+        user = User.objects.get(username=username)
+        code = default_token_generator.make_token(user)
+        user.confirmation_code = code_digest(code)
+        user.save()
+        user = User.objects.get(username=username)
+        if default_token_generator.check_token(user, code):
+            user.confirmation_code = code_digest(
+                default_token_generator.make_token(user)
+            )
+            user.save()
+
+    def login(self, username):
+        code = issue_code(User.objects.get(username=username))
+        assert redeem_code(User.objects.get(username=username), code)
+
+    def run(self, name, func, usernames, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for username in usernames:
+                func(username)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name}: {len(usernames) * rounds / elapsed:.0f} входов/с'
+        )
+
+    def handle(self, *args, **options):
+        usernames = [f'login{idx}' for idx in range(options['users'])]
+        runs = (
+            ('прежний путь', self.legacy_login, None),
+            ("'stored'", self.login, MODE_STORED),
+            ("'stateless'", self.login, MODE_STATELESS),
+        )
+        with rolled_back():
+            User.objects.bulk_create(
+                User(username=username, email=f'{username}@yamdb.fake')
+                for username in usernames
+            )
+            for name, func, mode in runs:
+                code_settings = {**settings.CONFIRMATION_CODE, 'MODE': mode}
+                with override_settings(CONFIRMATION_CODE=code_settings):
+                    self.run(name, func, usernames, options['rounds'])
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.outbox import drain, outbox_settings, outbox_stats, sender
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди. Используется, когда '
+            "EMAIL_OUTBOX['WORKER'] = 'command'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь один раз и завершиться.')
+        parser.add_argument('--batch-size', type=int,
+                            help='Писем в одной порции.')
+        parser.add_argument('--interval', type=float,
+                            help='Пауза между проверками очереди, с.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Только вывести состояние очереди.')
+
+    def report(self):
+        stats = outbox_stats()
+        self.stdout.write(
+            ', '.join(f'{name}: {value}' for name, value in stats.items())
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.report()
+            return
+        interval = options['interval'] or outbox_settings()['INTERVAL']
+        try:
+            while True:
+                if drain(options['batch_size']):
+                    self.report()
+                if options['once']:
+                    return
+                sender.close_idle()
+                close_old_connections()
+                time.sleep(interval)
+        finally:
+            sender.close()
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def check_duplicate_emails(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    duplicates = list(
+        User.objects.exclude(email='').values('email')
+        .annotate(count=models.Count('id')).filter(count__gt=1)
+        .values_list('email', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Email используется несколькими пользователями, исправьте '
+            f'данные перед миграцией: {", ".join(duplicates)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('email', ''), _negated=True), fields=('email',), name='users_user_email_unique'),
+        ),
+    ]
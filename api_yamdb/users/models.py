@@ -1,5 +1,16 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
+
+
+def email_lookup(email):
+    """
+    Условие по email. Уникальный индекс по email частичный
+    (без пустых строк), и СУБД использует его, только если
+    условие индекса явно повторено в запросе.
+    """
+    return models.Q(email=email) & ~models.Q(email='')
 
 
 class User(AbstractUser):
@@ -30,6 +41,23 @@ class User(AbstractUser):
         verbose_name='Токен пользователя',
     )
 
+    # Поля, которые передаются в токене доступа с ролью.
+    TOKEN_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из БД значения полей токена."""
+        user = super().from_db(db, field_names, values)
+        user.loaded_token_fields = user.token_fields()
+        return user
+
+    def token_fields(self):
+        """Загруженные значения полей токена без обращения к БД."""
+        return {
+            name: self.__dict__[name]
+            for name in self.TOKEN_FIELDS if name in self.__dict__
+        }
+
     def save(self, *args, **kwargs):
         """Создание суперпользователя с правами администратора."""
         if self.is_superuser is True:
@@ -53,6 +81,64 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ('username',)
+        constraints = (
+            # Пустой email допустим у нескольких пользователей,
+            # например у созданных через createsuperuser.
+            models.UniqueConstraint(
+                fields=('email',),
+                condition=~models.Q(email=''),
+                name='users_user_email_unique',
+            ),
+        )
 
     def __str__(self):
         return self.username
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (см. users/outbox.py)."""
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.CharField(
+        max_length=254,
+        verbose_name='Отправитель',
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Неудачных попыток',
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Время следующей попытки',
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+    def message(self, connection=None):
+        return EmailMessage(self.subject, self.body, self.from_email,
+                            [self.recipient], connection=connection)
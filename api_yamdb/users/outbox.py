@@ -0,0 +1,351 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+WORKER_THREAD = 'thread'
+WORKER_COMMAND = 'command'
+WORKER_EAGER = 'eager'
+
+
+def outbox_settings():
+    return settings.EMAIL_OUTBOX
+
+
+def backoff(attempts):
+    """Пауза перед следующей попыткой растёт вдвое с каждой неудачей."""
+    options = outbox_settings()
+    return min(options['BACKOFF'] * 2 ** (attempts - 1),
+               options['BACKOFF_MAX'])
+
+
+class OutboxMetrics:
+    """Счётчики отправки и задержки доставки последних писем в процессе."""
+
+    def __init__(self, size=1000):
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=size)
+
+    def record(self, sent, failed):
+        now = timezone.now()
+        with self._lock:
+            self.sent += len(sent)
+            self.failed += failed
+            self.latencies.extend(
+                (now - email.created).total_seconds() for email in sent
+            )
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            sent, failed = self.sent, self.failed
+        result = {'sent': sent, 'failed': failed}
+        if latencies:
+            result['latency_p50'] = latencies[len(latencies) // 2]
+            result['latency_max'] = latencies[-1]
+        return result
+
+
+metrics = OutboxMetrics()
+
+
+def outbox_stats():
+    """Глубина очереди в БД и метрики доставки этого процесса."""
+    max_attempts = outbox_settings()['MAX_ATTEMPTS']
+    queue = OutgoingEmail.objects.all()
+    return {
+        'queued': queue.filter(attempts__lt=max_attempts).count(),
+        'dead': queue.filter(attempts__gte=max_attempts).count(),
+        **metrics.snapshot(),
+    }
+
+
+def claim_batch(batch_size):
+    """
+    Выборка готовых к отправке писем. Время следующей попытки
+    сдвигается на LEASE секунд, чтобы другой обработчик не взял
+    те же письма, пока эти отправляются.
+    """
+    options = outbox_settings()
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutgoingEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            attempts__lt=options['MAX_ATTEMPTS'], next_attempt__lte=now
+        )[:batch_size])
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt=now + timedelta(seconds=options['LEASE']))
+    return emails
+
+
+class MailSender:
+    """
+    Соединение с почтовым сервером, которое переживает отдельные
+    порции писем: рукопожатие TCP и TLS выполняется один раз,
+    а соединение закрывается после IDLE_TIMEOUT секунд простоя
+    или после его обрыва.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.connection = None
+        self.last_used = 0
+        self.opened = 0
+
+    def open(self):
+        with self._lock:
+            if self.connection is None:
+                connection = get_connection()
+                connection.open()
+                self.connection = connection
+                self.opened += 1
+
+    def send(self, message):
+        """
+        Отправка одного письма через открытое соединение. Отказ
+        сервера принять письмо (например, SMTPRecipientsRefused)
+        соединение не закрывает: smtplib уже сбросил сеанс командой
+        RSET, и следующее письмо уходит через то же соединение.
+        """
+        with self._lock:
+            self.open()
+            try:
+                self.connection.send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                raise
+            except smtplib.SMTPException:
+                # Остальные ошибки SMTP — тоже OSError, но соединение цело.
+                raise
+            except OSError:
+                self.close()
+                raise
+            finally:
+                self.last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            connection, self.connection = self.connection, None
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    logger.exception('Ошибка закрытия почтового соединения')
+
+    def close_idle(self):
+        with self._lock:
+            if (self.connection is not None
+                    and time.monotonic() - self.last_used
+                    >= outbox_settings()['IDLE_TIMEOUT']):
+                self.close()
+
+
+sender = MailSender()
+
+
+def send_batch(emails):
+    """
+    Отправка порции через одно соединение, по письму за раз:
+    письмо, которое сервер не принял, откладывается, а принятые
+    до него повторно не отправляются. После обрыва соединения
+    остальные письма порции ждут следующей попытки.
+    Возвращает ошибки по id писем.
+    """
+    errors = {}
+    for position, email in enumerate(emails):
+        try:
+            sender.send(email.message())
+        except Exception as error:
+            if sender.connection is None:
+                # Сервер недоступен: остальные письма ждут следующей
+                # попытки.
+                errors.update(
+                    (email.pk, error) for email in emails[position:]
+                )
+                break
+            errors[email.pk] = error
+    return errors
+
+
+def deliver_batch(batch_size=None):
+    """
+    Отправка одной порции очереди. Отправленные письма удаляются,
+    для остальных откладывается следующая попытка.
+    Возвращает количество взятых из очереди писем.
+    """
+    emails = claim_batch(batch_size or outbox_settings()['BATCH_SIZE'])
+    if not emails:
+        return 0
+    errors = send_batch(emails)
+    now = timezone.now()
+    sent = [email for email in emails if email.pk not in errors]
+    failed = [email for email in emails if email.pk in errors]
+    for email in failed:
+        email.attempts += 1
+        email.next_attempt = now + timedelta(seconds=backoff(email.attempts))
+        email.error = repr(errors[email.pk])
+        logger.warning('Письмо %s не отправлено: %s', email.pk, email.error)
+    OutgoingEmail.objects.filter(pk__in=[email.pk for email in sent]).delete()
+    OutgoingEmail.objects.bulk_update(
+        failed, ('attempts', 'next_attempt', 'error')
+    )
+    metrics.record(sent, len(failed))
+    return len(emails)
+
+
+def drain(batch_size=None):
+    """Отправка всех готовых писем порциями."""
+    total = 0
+    while True:
+        count = deliver_batch(batch_size)
+        if not count:
+            return total
+        total += count
+
+
+class OutboxWorker:
+    """
+    Фоновый поток, который разбирает очередь писем. Он запускается
+    с первым запросом к процессу, просыпается после фиксации
+    транзакции, поставившей письмо в очередь, и раз в INTERVAL
+    секунд, чтобы повторить отложенные попытки.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.pending = 0
+
+    def start(self):
+        """Запуск потока, если он ещё не запущен."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Прежний поток завершился, флаг остановки ему не нужен.
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self.run, name='email-outbox', daemon=True
+                )
+                self._thread.start()
+
+    def wake(self):
+        with self._lock:
+            self.pending += 1
+        self.start()
+        self._wakeup.set()
+
+    def wait_for_batch(self):
+        """
+        Ожидание, пока наберётся BATCH_SIZE новых писем, но не дольше
+        FLUSH_INTERVAL секунд: во время всплеска регистраций письма
+        уходят общими порциями.
+        """
+        options = outbox_settings()
+        deadline = time.monotonic() + options['FLUSH_INTERVAL']
+        while (0 < self.pending < options['BATCH_SIZE']
+               and not self._stop.is_set()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wakeup.wait(remaining)
+            self._wakeup.clear()
+        with self._lock:
+            self.pending = 0
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(outbox_settings()['INTERVAL'])
+            self._wakeup.clear()
+            if outbox_settings()['WORKER'] != WORKER_THREAD:
+                return
+            try:
+                self.wait_for_batch()
+                drain()
+            except Exception:
+                logger.exception('Ошибка обработки очереди писем')
+                self._stop.wait(outbox_settings()['INTERVAL'])
+            finally:
+                sender.close_idle()
+                close_old_connections()
+        sender.close()
+
+    def stop(self, timeout=None):
+        """
+        Остановка потока: уже поставленные в очередь письма
+        отправляются без ожидания полной порции.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            # Поток ещё отправляет порцию: флаг остаётся, а второй
+            # поток не запускается, пока этот не завершится.
+            with self._lock:
+                if self._thread is None:
+                    self._thread = thread
+            return
+        self._stop.clear()
+
+
+worker = OutboxWorker()
+
+
+def start_worker(**kwargs):
+    """
+    Запуск фонового потока с первым запросом процесса: письма,
+    оставшиеся в очереди после перезапуска, уходят без ожидания
+    новой регистрации. Подключается к сигналу request_started.
+    """
+    if outbox_settings()['WORKER'] == WORKER_THREAD:
+        worker.start()
+
+
+def send_now():
+    """Немедленная отправка очереди без удержания соединения."""
+    try:
+        drain()
+    finally:
+        sender.close()
+
+
+def queue_email(subject, body, recipient, from_email=None):
+    """
+    Постановка письма в очередь. Отправка начинается после фиксации
+    текущей транзакции: в фоновом потоке (WORKER = 'thread'),
+    в этом же потоке (WORKER = 'eager') или командой sendemails.
+    """
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+    mode = outbox_settings()['WORKER']
+    if mode == WORKER_THREAD:
+        transaction.on_commit(worker.wake)
+    elif mode == WORKER_EAGER:
+        transaction.on_commit(send_now)
+    return email
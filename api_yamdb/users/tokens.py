@@ -0,0 +1,103 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import (
+    CLAIMS_VERSION_CLAIM,
+    check_claims_cache,
+    claims_version,
+)
+
+MODE_STATELESS = 'stateless'
+MODE_STORED = 'stored'
+
+
+class ConfirmationCodeGenerator(PasswordResetTokenGenerator):
+    """
+    Код подтверждения: HMAC от id, email и времени последнего входа
+    пользователя с отметкой времени выпуска. Код проверяется без
+    обращения к БД и перестаёт действовать после входа по нему
+    (меняется last_login) или через CONFIRMATION_CODE['TIMEOUT'] секунд.
+    Отдельная соль не позволяет использовать вместо кода токен сброса
+    пароля и наоборот.
+    """
+
+    key_salt = 'users.tokens.ConfirmationCodeGenerator'
+
+    def _make_hash_value(self, user, timestamp):
+        login = '' if user.last_login is None else user.last_login.isoformat()
+        return f'{user.pk}{user.email}{login}{timestamp}'
+
+    def check_token(self, user, token):
+        if not super().check_token(user, token):
+            return False
+        issued = base36_to_int(token.split('-')[0])
+        return (self._num_seconds(self._now()) - issued
+                <= settings.CONFIRMATION_CODE['TIMEOUT'])
+
+
+confirmation_code_generator = ConfirmationCodeGenerator()
+
+
+def code_digest(code):
+    """
+    Отпечаток кода для поля confirmation_code (32 символа): сам код
+    длиннее поля, а в БД не остаётся кода, годного для входа.
+    """
+    return hashlib.blake2b(str(code).encode(), digest_size=16).hexdigest()
+
+
+def issue_code(user):
+    """
+    Новый код подтверждения. В режиме 'stored' отпечаток кода
+    дополнительно сохраняется в пользователе одним узким UPDATE.
+    """
+    code = confirmation_code_generator.make_token(user)
+    if settings.CONFIRMATION_CODE['MODE'] == MODE_STORED:
+        user.confirmation_code = code_digest(code)
+        user.save(update_fields=('confirmation_code',))
+    return code
+
+
+def redeem_code(user, code):
+    """
+    Проверка кода и вход по нему. Успешный вход обновляет только
+    last_login, из-за чего этот и все ранее выданные коды
+    становятся недействительными.
+    """
+    code = str(code)
+    if not confirmation_code_generator.check_token(user, code):
+        return False
+    update_fields = ['last_login']
+    if settings.CONFIRMATION_CODE['MODE'] == MODE_STORED:
+        if not constant_time_compare(user.confirmation_code or '',
+                                     code_digest(code)):
+            return False
+        user.confirmation_code = None
+        update_fields.append('confirmation_code')
+    user.last_login = timezone.now()
+    user.save(update_fields=update_fields)
+    return True
+
+
+def access_token_for(user):
+    """
+    Токен доступа пользователя. При SIMPLE_JWT['ROLE_CLAIMS'] в него
+    добавляются username, роль, флаги и версия утверждений, чтобы
+    проверять права без чтения пользователя из БД. Срок жизни токена
+    прежний, ACCESS_TOKEN_LIFETIME: смена роли отзывает его через
+    версию утверждений в общем кэше.
+    """
+    token = RefreshToken.for_user(user).access_token
+    if settings.SIMPLE_JWT.get('ROLE_CLAIMS'):
+        check_claims_cache()
+        for name, value in user.token_fields().items():
+            token[name] = value
+        token[CLAIMS_VERSION_CLAIM] = claims_version(user.pk)
+    return token
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_email_outbox(settings):
+    from users.outbox import sender
+
+    settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'eager'}
+    yield
+    sender.close()
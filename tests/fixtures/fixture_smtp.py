@@ -0,0 +1,77 @@
+import socketserver
+import threading
+
+import pytest
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и запоминает их."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.recipients = []
+        self.reply('220 localhost debugging server')
+        while True:
+            line = self.rfile.readline().decode().rstrip('\r\n')
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            handler = getattr(self, f'smtp_{command}', None)
+            if handler is None:
+                self.reply('250 OK')
+            else:
+                handler(line)
+
+    def smtp_EHLO(self, line):
+        self.reply('250 localhost')
+
+    smtp_HELO = smtp_EHLO
+
+    def smtp_MAIL(self, line):
+        self.recipients = []
+        self.reply('250 OK')
+
+    smtp_RSET = smtp_MAIL
+
+    def smtp_RCPT(self, line):
+        address = line.split(':', 1)[1].strip(' <>')
+        if address in self.server.rejected:
+            self.reply('550 No such user')
+            return
+        self.recipients.append(address)
+        self.reply('250 OK')
+
+    def smtp_DATA(self, line):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        while self.rfile.readline() not in (b'.\r\n', b''):
+            pass
+        self.server.messages.extend(self.recipients)
+        self.reply('250 OK')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+    settings.EMAIL_USE_TLS = settings.EMAIL_USE_SSL = False
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,103 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              admin, user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения обновляется '
+            'при создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 7, (
+            'Проверьте, что рейтинг произведения обновляется '
+            'при изменении оценки в отзыве.'
+        )
+
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 9, (
+            'Проверьте, что рейтинг произведения обновляется '
+            'при удалении отзыва.'
+        )
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) is None, (
+            'Проверьте, что рейтинг произведения сбрасывается '
+            'после удаления автора последнего отзыва.'
+        )
+
+    def test_02_rebuild_ratings_command(self, client, admin_client, admin,
+                                        user_client, user):
+        from reviews.models import Title
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(
+            rating=1, review_count=0, score_sum=0
+        )
+
+        etag = client.get(f'/api/v1/titles/{title_id}/')['ETag']
+
+        with pytest.raises(CommandError):
+            call_command('rebuildratings', check=True)
+        call_command('rebuildratings')
+        call_command('rebuildratings', check=True)
+        response = client.get(f'/api/v1/titles/{title_id}/',
+                              HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `rebuildratings` сбрасывает кэш и ETag '
+            'произведений.'
+        )
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.review_count, title.score_sum) == (2, 10)
+        assert self.get_rating(client, title_id) == 5
+
+    def test_03_stale_review_instance(self, user):
+        from api.serializers import ReviewSerializer
+        from reviews.models import Review, Title
+        from reviews.ratings import find_rating_drift, update_title_rating
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        update_title_rating(title.id, 5, 1)
+        first, second = (Review.objects.get(pk=review.pk) for _ in range(2))
+        request = SimpleNamespace(method='PATCH')
+        for instance, score in ((first, 7), (second, 9)):
+            serializer = ReviewSerializer(instance, data={'score': score},
+                                          partial=True,
+                                          context={'request': request})
+            assert serializer.is_valid(), serializer.errors
+            serializer.save()
+        title.refresh_from_db()
+        assert (title.score_sum, title.rating) == (9, 9), (
+            'Проверьте, что при изменении отзыва прежняя оценка читается '
+            'из БД под блокировкой, а не из загруженного ранее объекта.'
+        )
+        assert find_rating_drift() == []
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def create_catalogue(count):
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Фильм', slug='film')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    for idx in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres[:idx % 3 + 1])
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    @pytest.mark.parametrize('titles_count', (1, 5, 12))
+    def test_01_titles_list_fixed_query_count(self, client, titles_count):
+        create_catalogue(titles_count)
+        url = '/api/v1/titles/'
+        assert count_queries(client, url) == 4, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет фиксированное '
+            'число запросов к БД независимо от количества произведений '
+            'на странице: жанры и категории должны загружаться заранее.'
+        )
+
+    def test_02_reviews_list_fixed_query_count(self, client, admin,
+                                               moderator, user):
+        from reviews.models import Review, Title
+
+        create_catalogue(1)
+        title = Title.objects.get()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        Review.objects.create(title=title, author=admin, text='1', score=5)
+        single = count_queries(client, url)
+        for author in (moderator, user):
+            Review.objects.create(
+                title=title, author=author, text='2', score=5
+            )
+        cache.clear()
+        assert count_queries(client, url) == single, (
+            f'Проверьте, что GET-запрос к `{url}` не делает отдельный '
+            'запрос к БД за автором каждого отзыва.'
+        )
@@ -0,0 +1,82 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CsvImport:
+
+    def test_01_csvimport_loads_all_files(self):
+        from reviews.models import Comment, Review, Title
+
+        call_command('csvimport', batch_size=10, stdout=StringIO())
+        assert Title.objects.count() == 32
+        assert Title.genre.through.objects.count() == 42, (
+            'Проверьте, что команда `csvimport` загружает связи '
+            'произведений и жанров из `genre_title.csv`.'
+        )
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count(), (
+            'Проверьте, что после загрузки отзывов команда `csvimport` '
+            'пересчитывает рейтинг произведений.'
+        )
+
+    def test_02_csvimport_is_idempotent(self):
+        from reviews.models import Review
+
+        call_command('csvimport', stdout=StringIO())
+        out = StringIO()
+        call_command('csvimport', stdout=out)
+        assert Review.objects.count() == 72
+        assert 'добавлено 0, пропущено 72' in out.getvalue(), (
+            'Проверьте, что повторный запуск `csvimport` пропускает '
+            'уже загруженные строки.'
+        )
+
+    def test_03_csvimport_parallel(self):
+        from reviews.models import Comment, Title
+
+        out = StringIO()
+        call_command('csvimport', parallel=True, stdout=out)
+        assert Title.genre.through.objects.count() == 42
+        assert Comment.objects.count() == 3, (
+            'Проверьте, что в режиме `--parallel` команда `csvimport` '
+            'загружает зависимые файлы после родительских.'
+        )
+        assert 'Критический путь' in out.getvalue()
+
+    @pytest.mark.parametrize('options', ({}, {'gzip': True, 'parallel': True}))
+    def test_04_csvexport_roundtrip(self, tmp_path, options):
+        from reviews.models import Comment, Review
+
+        call_command('csvimport', stdout=StringIO())
+        call_command('csvexport', path=str(tmp_path), chunk_size=10,
+                     stdout=StringIO(), **options)
+        dates = dict(Review.objects.values_list('id', 'pub_date'))
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+
+        call_command('csvimport', path=str(tmp_path), stdout=StringIO())
+        assert Comment.objects.count() == 3
+        assert dict(Review.objects.values_list('id', 'pub_date')) == dates, (
+            'Проверьте, что выгрузка `csvexport` загружается обратно '
+            'командой `csvimport` без потери дат публикации.'
+        )
+
+    def test_05_csvexport_keeps_plain_files(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command('csvexport', stdout=StringIO())
+        call_command('csvexport', path=str(tmp_path), stdout=StringIO())
+        with pytest.raises(CommandError):
+            call_command('csvexport', path=str(tmp_path), gzip=True,
+                         stdout=StringIO())
+        assert not list(tmp_path.glob('*.gz')), (
+            'Проверьте, что `csvexport --gzip` не пишет сжатые файлы '
+            'рядом с несжатыми: `csvimport` загрузил бы старые данные.'
+        )
+        (tmp_path / 'users.csv.gz').write_bytes(b'')
+        with pytest.raises(CommandError):
+            call_command('csvimport', path=str(tmp_path), stdout=StringIO())
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+
+
+def create_feed(django_user_model, count):
+    from reviews.models import Comment, Review, Title
+
+    title = Title.objects.create(name='Произведение', year=2000)
+    reviews = []
+    for idx in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+        )
+        reviews.append(Review.objects.create(
+            title=title, author=author, text=f'review {idx}', score=5
+        ))
+        Comment.objects.create(
+            review=reviews[0], author=author, text=f'comment {idx}'
+        )
+    return title, reviews
+
+
+def follow_cursor(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что курсорная пагинация не выполняет COUNT(*).'
+        )
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11FeedPagination:
+
+    def test_01_page_number_is_default(self, client, django_user_model):
+        title, reviews = create_feed(django_user_model, 7)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data.get('count') == 7, (
+            f'Проверьте, что по умолчанию `{url}` использует '
+            'постраничную пагинацию.'
+        )
+        assert len(data['results']) == 5
+        assert len(client.get(f'{url}?page=2').json()['results']) == 2
+
+    @pytest.mark.parametrize('feed', ('reviews', 'comments'))
+    def test_02_cursor_walks_whole_feed(self, client, django_user_model,
+                                        feed):
+        title, reviews = create_feed(django_user_model, 12)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        expected = [review.id for review in reviews][::-1]
+        if feed == 'comments':
+            url = f'{url}{reviews[0].id}/comments/'
+            expected = list(
+                reviews[0].comments.order_by('-pub_date', '-id')
+                .values_list('id', flat=True)
+            )
+        ids = follow_cursor(client, f'{url}?pagination=cursor')
+        assert ids == expected, (
+            f'Проверьте, что курсорная пагинация `{url}` возвращает все '
+            'объекты по убыванию даты публикации без повторов и пропусков.'
+        )
@@ -0,0 +1,247 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_comments, create_reviews,
+                         create_single_review)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ReviewCache:
+
+    def test_01_reviews_list_cached_per_title(self, client, admin_client,
+                                              admin, user_client, user,
+                                              moderator_client):
+        from api.cache import review_pages
+
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        stats = review_pages.stats()
+
+        assert client.get(url)['X-Cache'] == 'MISS'
+        assert client.get(url)['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` '
+            'обслуживается из кэша.'
+        )
+        assert client.get(f'{url}?page=1')['X-Cache'] == 'MISS'
+        assert client.get(other_url)['X-Cache'] == 'MISS'
+        assert client.get(other_url)['X-Cache'] == 'HIT'
+        assert review_pages.stats()['hits'] == stats['hits'] + 2
+
+        create_single_review(user_client, titles[0]['id'], 'new', 7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что создание отзыва сбрасывает кэш `{url}`.'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что создание отзыва не сбрасывает кэш '
+            'отзывов других произведений.'
+        )
+
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'x'})
+        texts = {item['text'] for item in client.get(url).json()['results']}
+        assert 'x' in texts, (
+            f'Проверьте, что изменение отзыва сбрасывает кэш `{url}`.'
+        )
+
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert client.get(url).json()['count'] == 1, (
+            f'Проверьте, что удаление отзыва сбрасывает кэш `{url}`.'
+        )
+
+    def test_02_deleted_title_not_served_from_cache(
+            self, client, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        client.get(url)
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_cache_hit_without_queries(self, client, admin_client, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response['X-Cache'] == 'HIT' and response['ETag'] == etag
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert len(context.captured_queries) == 0, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` из кэша, '
+            'в том числе 304, не обращается к БД.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ReferenceCache:
+
+    @pytest.mark.parametrize('resource', ('categories', 'genres'))
+    def test_01_generation_cache_and_etag(self, client, admin_client,
+                                          resource):
+        url = f'/api/v1/{resource}/'
+        admin_client.post(url, data={'name': 'Первый', 'slug': 'first'})
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert response['X-Cache'] == 'MISS'
+        assert client.get(url)['X-Cache'] == 'HIT'
+        assert client.get(f'{url}?search=Пер')['ETag'] != etag, (
+            f'Проверьте, что результаты поиска `{url}` кэшируются '
+            'отдельно от полного списка.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+
+        admin_client.post(url, data={'name': 'Второй', 'slug': 'second'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что создание объекта сбрасывает кэш `{url}`.'
+        )
+        assert response.json()['count'] == 2
+
+        admin_client.delete(f'{url}second/')
+        assert client.get(url).json()['count'] == 1, (
+            f'Проверьте, что удаление объекта сбрасывает кэш `{url}`.'
+        )
+
+    @pytest.mark.parametrize('resource', ('categories', 'genres'))
+    def test_02_orm_writes_reset_generation(self, client, resource):
+        from reviews.models import Category, Genre
+
+        model = {'categories': Category, 'genres': Genre}[resource]
+        url = f'/api/v1/{resource}/'
+        item = model.objects.create(name='Первый', slug='first')
+        etag = client.get(url)['ETag']
+        for write in (
+            lambda: model.objects.create(name='Второй', slug='second'),
+            lambda: setattr(item, 'name', 'Переименован') or item.save(),
+            lambda: model.objects.filter(slug='second').delete(),
+        ):
+            write()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что запись в обход API (админка, ORM) '
+                f'сбрасывает кэш и ETag `{url}`.'
+            )
+            etag = response['ETag']
+        assert client.get(url).json()['results'][0]['name'] == 'Переименован'
+
+    def test_03_csvimport_resets_cache(self, client):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        url = '/api/v1/categories/'
+        etag = client.get(url)['ETag']
+        call_command('csvimport', stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] > 0
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` '
+            'содержит заголовок ETag.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+        return etag
+
+    def test_01_all_viewsets_support_etag(self, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        comment_url = f'{review_url}comments/{comments[0]["id"]}/'
+        for url in ('/api/v1/titles/', title_url, f'{title_url}reviews/',
+                    review_url, f'{review_url}comments/', comment_url,
+                    '/api/v1/users/', f'/api/v1/users/{admin.username}/'):
+            self.check_not_modified(admin_client, url)
+
+    def test_02_etag_changes_after_write(self, admin_client, admin,
+                                         user_client, user):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        etags = {
+            url: self.check_not_modified(admin_client, url)
+            for url in ('/api/v1/titles/', title_url, review_url,
+                        f'/api/v1/users/{admin.username}/')
+        }
+
+        admin_client.patch(review_url, data={'score': 9})
+        admin_client.patch('/api/v1/users/me/', data={'bio': 'new bio'})
+        for url, etag in etags.items():
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения данных GET-запрос к `{url}` '
+                'со старым If-None-Match возвращает ответ со статусом 200.'
+            )
+
+    def test_03_orm_edits_change_etag(self, admin_client, admin):
+        from reviews.models import Comment, Review, Title
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        comment_url = f'{review_url}comments/{comments[0]["id"]}/'
+        writes = (
+            ((title_url, '/api/v1/titles/'),
+             Title, titles[0]['id'], 'description', 'Новое описание'),
+            ((review_url, f'{title_url}reviews/'),
+             Review, reviews[0]['id'], 'text', 'Новый текст'),
+            ((comment_url, f'{review_url}comments/'),
+             Comment, comments[0]['id'], 'text', 'Новый текст'),
+            ((f'/api/v1/users/{admin.username}/', '/api/v1/users/'),
+             type(admin), admin.pk, 'bio', 'Новое о себе'),
+        )
+        for urls, model, pk, field, value in writes:
+            etags = {url: self.check_not_modified(admin_client, url)
+                     for url in urls}
+            instance = model.objects.get(pk=pk)
+            setattr(instance, field, value)
+            instance.save()
+            for url, etag in etags.items():
+                response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                assert response.status_code == HTTPStatus.OK, (
+                    'Проверьте, что изменение объекта в обход API '
+                    f'(админка, ORM) меняет ETag `{url}`.'
+                )
+                assert response.json().get(field, value) == value
+
+    def test_04_versions_expire(self, client, settings):
+        from django.core.cache import cache
+
+        from api.cache import title_pages
+        from reviews.title_index import title_index
+
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/?genre=drama')
+        for key in (title_pages.version_key('all'),
+                    title_index.generation_key):
+            assert cache._expire_info.get(cache.make_key(key)), (
+                'Проверьте, что номера версий кэша ответов и поколение '
+                'индекса произведений хранятся в кэше с конечным сроком.'
+            )
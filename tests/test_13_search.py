@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_prefix_and_description(self, client,
+                                                 admin_client):
+        create_titles(admin_client)
+        assert self.search(client, 'термин') == ['Терминатор'], (
+            'Проверьте, что параметр `search` эндпоинта `/api/v1/titles/` '
+            'находит произведения по началу слова в названии.'
+        )
+        assert self.search(client, 'yippie') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `search` эндпоинта `/api/v1/titles/` '
+            'ищет также по описанию произведения.'
+        )
+        assert self.search(client, 'крепк ореш') == ['Крепкий орешек']
+        assert self.search(client, 'крепк термин') == []
+        assert self.search(client, '"*:()') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+
+    def test_02_search_ranking(self, client, admin_client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Космос', year=2000,
+                             description='Фильм о другом')
+        Title.objects.create(name='Космос: космос', year=2000,
+                             description='Космос и снова космос')
+        assert self.search(client, 'космос') == [
+            'Космос: космос', 'Космос'
+        ], (
+            'Проверьте, что результаты поиска отсортированы '
+            'по релевантности.'
+        )
+
+    def test_03_search_index_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.patch(url, data={'name': 'Хищник'})
+        assert self.search(client, 'термин') == []
+        assert self.search(client, 'хищ') == ['Хищник'], (
+            'Проверьте, что поисковый индекс обновляется '
+            'при изменении произведения.'
+        )
+        admin_client.delete(url)
+        assert self.search(client, 'хищ') == [], (
+            'Проверьте, что поисковый индекс обновляется '
+            'при удалении произведения.'
+        )
@@ -0,0 +1,149 @@
+from http import HTTPStatus
+
+import pytest
+
+
+def create_library():
+    from reviews.models import Category, Genre, Title
+
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    genres = [
+        Genre.objects.create(name=name, slug=name)
+        for name in ('drama', 'comedy', 'horror')
+    ]
+    for idx in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000,
+            category=(films, books, None)[idx % 3],
+        )
+        title.genre.set(
+            genre for bit, genre in enumerate(genres) if idx >> bit & 1
+        )
+
+
+def expected_ids(genres=(), match_all=False, category=None):
+    from reviews.models import Title
+
+    result = []
+    for title in Title.objects.prefetch_related('genre').select_related(
+            'category').order_by('-id'):
+        slugs = {genre.slug for genre in title.genre.all()}
+        if genres and match_all and not set(genres) <= slugs:
+            continue
+        if genres and not match_all and not set(genres) & slugs:
+            continue
+        if category and getattr(title.category, 'slug', None) != category:
+            continue
+        result.append(title.id)
+    return result
+
+
+def listed_ids(client, params):
+    ids, url = [], '/api/v1/titles/'
+    while url:
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        ids.extend(title['id'] for title in data['results'])
+        url, params = data['next'], None
+    return ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleIndex:
+
+    @pytest.mark.parametrize('genres, match_all, category', (
+        (('drama',), False, None),
+        (('drama', 'horror'), False, None),
+        (('drama', 'horror'), True, None),
+        (('drama', 'comedy', 'horror'), True, None),
+        ((), False, 'books'),
+        (('comedy', 'horror'), False, 'films'),
+        (('comedy', 'horror'), True, 'films'),
+        (('unknown',), False, None),
+    ))
+    def test_01_genre_and_category_filters(self, client, genres, match_all,
+                                           category):
+        create_library()
+        params = {}
+        if genres:
+            params['genre'] = ','.join(genres)
+        if match_all:
+            params['genre_match'] = 'all'
+        if category:
+            params['category'] = category
+        expected = expected_ids(genres, match_all, category)
+        assert listed_ids(client, params) == expected, (
+            'Проверьте, что `/api/v1/titles/` фильтрует произведения '
+            'по нескольким жанрам (genre_match=any|all) и категории.'
+        )
+        params['year'] = 2000
+        assert listed_ids(client, params) == expected, (
+            'Проверьте, что фильтр по жанрам в БД и по индексу '
+            'возвращает одинаковые произведения.'
+        )
+
+    def test_02_invalid_genre_match(self, client):
+        response = client.get('/api/v1/titles/',
+                              {'genre': 'drama', 'genre_match': 'some'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_index_follows_writes(self, client, admin_client):
+        from reviews.models import Title
+        from reviews.title_index import title_index
+
+        create_library()
+        params = {'genre': 'horror', 'category': 'films'}
+        assert listed_ids(client, params) == expected_ids(
+            ('horror',), False, 'films'
+        )
+        title = Title.objects.filter(category__slug='books').first()
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/',
+            data={'genre': ['horror'], 'category': 'films'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert title.id in listed_ids(client, params), (
+            'Проверьте, что индекс жанров и категорий обновляется '
+            'при изменении произведения.'
+        )
+        assert listed_ids(client, params) == expected_ids(
+            ('horror',), False, 'films'
+        )
+        assert title.id not in listed_ids(client, {'genre': 'drama'})
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert title.id not in listed_ids(client, params), (
+            'Проверьте, что индекс жанров и категорий обновляется '
+            'при удалении произведения.'
+        )
+        Title.objects.filter(category__slug='films').update(category=None)
+        title_index.invalidate()
+        assert listed_ids(client, params) == []
+
+    def test_04_foreign_generation_rebuilds(self, client):
+        from django.core.cache import cache
+
+        from reviews.models import Genre, Title
+        from reviews.title_index import title_index
+
+        create_library()
+        params = {'genre': 'drama'}
+        listed_ids(client, params)
+        drama = Genre.objects.get(slug='drama')
+        # Другой процесс добавил произведение и увеличил поколение.
+        Title.objects.bulk_create(
+            [Title(name='Из другого процесса', year=2000)]
+        )
+        foreign = Title.objects.get(name='Из другого процесса')
+        Title.genre.through.objects.bulk_create(
+            [Title.genre.through(title_id=foreign.id, genre_id=drama.id)]
+        )
+        cache.incr(title_index.generation_key)
+        local = Title.objects.create(name='Локальное', year=2000)
+        local.genre.set([drama])
+        ids = listed_ids(client, params)
+        assert local.id in ids and foreign.id in ids, (
+            'Проверьте, что индекс перестраивается, если поколение '
+            'в кэше увеличил другой процесс.'
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+from tests.utils import create_comments
+
+
+def asgi_get(path, query=''):
+    return async_to_sync(asgi_request)(path, query)
+
+
+async def asgi_request(path, query=''):
+    from api_yamdb.asgi import application
+
+    communicator = ApplicationCommunicator(application, {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    })
+
+    await communicator.send_input({'type': 'http.request'})
+    start = await communicator.receive_output(10)
+    body = b''
+    while True:
+        message = await communicator.receive_output(10)
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return start['status'], json.loads(body)
+
+
+class ConcurrentQueries:
+    """Наибольшее число SQL-запросов, выполнявшихся одновременно."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = True
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.active:
+            return execute(sql, params, many, context)
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def connected(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15AsyncReadPaths:
+
+    def read_urls(self, titles, reviews):
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        return (
+            '/api/v1/titles/',
+            title_url,
+            f'{title_url}reviews/',
+            f'{title_url}reviews/{reviews[0]["id"]}/comments/',
+        )
+
+    def test_01_async_urlconf_matches_sync(self, client, settings, admin,
+                                           admin_client, user, user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        urls = self.read_urls(titles, reviews)
+        expected = [client.get(url).json() for url in urls]
+        settings.ROOT_URLCONF = settings.ASGI_URLCONF
+        for url, data in zip(urls, expected):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json() == data, (
+                f'Проверьте, что асинхронный маршрут `{url}` возвращает '
+                'те же данные, что и синхронный.'
+            )
+        etag = client.get(urls[0])['ETag']
+        response = client.get(urls[0], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        response = admin_client.patch(urls[1], data={'name': 'Хищник'})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что запросы на запись по асинхронным маршрутам '
+            'обрабатываются синхронными view.'
+        )
+        assert client.get(urls[1]).json()['name'] == 'Хищник'
+        response = client.post(urls[0], data={'name': 'Чужой'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_02_asgi_application(self, admin, admin_client, user,
+                                 user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        for url in self.read_urls(titles, reviews):
+            status, data = asgi_get(url)
+            assert status == HTTPStatus.OK, (
+                f'Проверьте, что ASGI-приложение обслуживает `{url}`.'
+            )
+        status, data = asgi_get('/api/v1/titles/', 'genre=horror')
+        assert status == HTTPStatus.OK
+        assert [title['id'] for title in data['results']] == [
+            titles[0]['id']
+        ]
+        status, data = asgi_get('/api/v1/titles/0/')
+        assert status == HTTPStatus.NOT_FOUND
+
+    def test_03_concurrent_reads(self, admin, admin_client):
+        from django.db.backends.signals import connection_created
+
+        create_comments(admin_client, {admin: admin_client})
+        queries = ConcurrentQueries(0.05)
+        connection_created.connect(queries.connected)
+
+        async def read_all():
+            return await asyncio.gather(*(
+                asgi_request('/api/v1/titles/') for _ in range(4)
+            ))
+
+        try:
+            results = async_to_sync(read_all)()
+        finally:
+            queries.active = False
+            connection_created.disconnect(queries.connected)
+        assert [status for status, _ in results] == [HTTPStatus.OK] * 4
+        assert queries.max_running > 1, (
+            'Проверьте, что под ASGI чтения выполняются параллельно '
+            'в пуле потоков: middleware не должны переводить цепочку '
+            'в общий синхронный поток.'
+        )
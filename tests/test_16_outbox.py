@@ -0,0 +1,152 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+class FlakyBackend(EmailBackend):
+    """Почтовый бэкенд, который не отправляет первые failures писем."""
+
+    failures = 0
+    connections = 0
+
+    def open(self):
+        FlakyBackend.connections += 1
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('SMTP недоступен')
+        return super().send_messages(messages)
+
+
+def signup(client, username):
+    response = client.post(SIGNUP_URL, data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16EmailOutbox:
+
+    def test_01_signup_queues_email(self, client, settings):
+        from users.models import OutgoingEmail
+        from users.outbox import drain, outbox_stats
+
+        settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'command'}
+        settings.EMAIL_BACKEND = 'tests.test_16_outbox.FlakyBackend'
+        FlakyBackend.connections = 0
+        for username in ('first', 'second', 'third'):
+            signup(client, username)
+        assert mail.outbox == [], (
+            f'Проверьте, что `{SIGNUP_URL}` не отправляет письмо сам, '
+            'а ставит его в очередь.'
+        )
+        assert OutgoingEmail.objects.count() == 3
+        assert outbox_stats()['queued'] == 3
+        assert drain() == 3
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'first@yamdb.fake', 'second@yamdb.fake', 'third@yamdb.fake'
+        ]
+        assert FlakyBackend.connections == 1, (
+            'Проверьте, что порция писем отправляется через одно соединение.'
+        )
+        assert not OutgoingEmail.objects.exists()
+        stats = outbox_stats()
+        assert stats['queued'] == 0
+        assert stats['latency_p50'] >= 0
+
+    def test_02_retry_with_backoff(self, client, settings):
+        from django.utils import timezone
+
+        from users.models import OutgoingEmail
+        from users.outbox import drain, outbox_stats
+
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX, 'WORKER': 'command', 'MAX_ATTEMPTS': 3
+        }
+        settings.EMAIL_BACKEND = 'tests.test_16_outbox.FlakyBackend'
+        FlakyBackend.failures = 1
+        signup(client, 'first')
+        drain()
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and 'SMTP' in email.error
+        assert email.next_attempt > timezone.now(), (
+            'Проверьте, что после ошибки отправка откладывается.'
+        )
+        assert drain() == 0 and mail.outbox == []
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        assert drain() == 1
+        assert len(mail.outbox) == 1
+        assert not OutgoingEmail.objects.exists()
+
+        FlakyBackend.failures = 6
+        signup(client, 'second')
+        for _ in range(3):
+            OutgoingEmail.objects.update(next_attempt=timezone.now())
+            drain()
+        FlakyBackend.failures = 0
+        stats = outbox_stats()
+        assert (stats['queued'], stats['dead']) == (0, 1), (
+            'Проверьте, что после MAX_ATTEMPTS неудач письмо '
+            'больше не отправляется.'
+        )
+
+    def test_03_background_worker(self, client, settings):
+        from users.outbox import worker
+
+        settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'thread'}
+        signup(client, 'first')
+        deadline = time.monotonic() + 5
+        while not mail.outbox and time.monotonic() < deadline:
+            time.sleep(0.05)
+        worker.stop(5)
+        assert [message.to for message in mail.outbox] == [
+            ['first@yamdb.fake']
+        ], 'Проверьте, что фоновый поток отправляет письма из очереди.'
+
+    def test_04_worker_starts_with_first_request(self, client, settings):
+        from users.outbox import queue_email, worker
+
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX, 'WORKER': 'command', 'INTERVAL': 0.1
+        }
+        queue_email('Код', 'Письмо до перезапуска', 'first@yamdb.fake')
+        settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'thread'}
+        client.get('/api/v1/categories/')
+        deadline = time.monotonic() + 5
+        while not mail.outbox and time.monotonic() < deadline:
+            time.sleep(0.05)
+        worker.stop(5)
+        assert [message.to for message in mail.outbox] == [
+            ['first@yamdb.fake']
+        ], (
+            'Проверьте, что фоновый поток запускается с первым запросом '
+            'и отправляет письма, оставшиеся в очереди.'
+        )
+
+    def test_05_stop_waits_for_thread(self, monkeypatch):
+        import threading
+
+        from users.outbox import OutboxWorker
+
+        worker = OutboxWorker()
+        release = threading.Event()
+        monkeypatch.setattr(worker, 'run', release.wait)
+        worker.start()
+        thread = worker._thread
+        worker.stop(0.05)
+        worker.start()
+        assert worker._thread is thread, (
+            'Проверьте, что после stop() с истёкшим timeout второй '
+            'поток не запускается, пока первый не завершился.'
+        )
+        assert worker._stop.is_set()
+        release.set()
+        worker.stop(5)
+        assert not thread.is_alive() and not worker._stop.is_set()
@@ -0,0 +1,94 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+def signup(client, *usernames):
+    for username in usernames:
+        response = client.post(SIGNUP_URL, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17MailBatches:
+
+    def test_01_batches_share_smtp_connection(self, client, settings,
+                                              smtp_server):
+        from users.models import OutgoingEmail
+        from users.outbox import drain
+
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX, 'WORKER': 'command', 'BATCH_SIZE': 2
+        }
+        signup(client, 'first', 'second', 'third', 'fourth', 'fifth')
+        assert drain() == 5
+        assert sorted(smtp_server.messages) == sorted(
+            f'{name}@yamdb.fake'
+            for name in ('first', 'second', 'third', 'fourth', 'fifth')
+        )
+        signup(client, 'sixth')
+        drain()
+        assert len(smtp_server.messages) == 6
+        assert smtp_server.connections == 1, (
+            'Проверьте, что порции писем отправляются через одно '
+            'постоянное SMTP-соединение.'
+        )
+        assert not OutgoingEmail.objects.exists()
+
+    def test_02_rejected_recipient_is_isolated(self, client, settings,
+                                               smtp_server):
+        from users.models import OutgoingEmail
+        from users.outbox import drain
+
+        settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'command'}
+        smtp_server.rejected.add('second@yamdb.fake')
+        signup(client, 'first', 'second', 'third')
+        drain()
+        assert sorted(smtp_server.messages) == [
+            'first@yamdb.fake', 'third@yamdb.fake'
+        ], (
+            'Проверьте, что ошибка одного письма не задерживает '
+            'остальные письма порции и не отправляет их повторно.'
+        )
+        assert smtp_server.connections == 1, (
+            'Проверьте, что отказ в получателе не закрывает '
+            'SMTP-соединение.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert (email.recipient, email.attempts) == ('second@yamdb.fake', 1)
+
+    def test_03_worker_flushes_full_batches(self, client, settings,
+                                            monkeypatch):
+        from users import outbox
+
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX,
+            'WORKER': 'thread',
+            'BATCH_SIZE': 3,
+            'FLUSH_INTERVAL': 5,
+        }
+        batches = []
+        claim_batch = outbox.claim_batch
+
+        def counting_claim_batch(batch_size):
+            emails = claim_batch(batch_size)
+            if emails:
+                batches.append(len(emails))
+            return emails
+
+        monkeypatch.setattr(outbox, 'claim_batch', counting_claim_batch)
+        signup(client, 'first', 'second', 'third')
+        deadline = time.monotonic() + 3
+        while len(mail.outbox) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        outbox.worker.stop(5)
+        assert batches == [3] and len(mail.outbox) == 3, (
+            'Проверьте, что фоновый поток отправляет письма порцией, '
+            'как только наберётся BATCH_SIZE писем.'
+        )
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+def signup_queries(client, data, status=HTTPStatus.OK):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(SIGNUP_URL, data=data)
+    assert response.status_code == status
+    return [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18SignUpQueries:
+
+    @pytest.fixture(autouse=True)
+    def queue_only(self, settings):
+        settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'command'}
+
+    def test_01_new_user(self, client):
+        queries = signup_queries(
+            client, {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        selects = [sql for sql in queries if sql.startswith('SELECT')]
+        assert len(selects) == 1, (
+            'Проверьте, что при регистрации пользователь ищется '
+            'по имени и email одним запросом.'
+        )
+        assert len(queries) <= 5, (
+            'Проверьте, что регистрация нового пользователя выполняет '
+            'не больше пяти запросов: поиск, транзакцию создания '
+            'и постановку письма в очередь.'
+        )
+
+    def test_02_returning_user(self, client, django_user_model):
+        django_user_model.objects.create_user(
+            username='regular', email='regular@yamdb.fake'
+        )
+        queries = signup_queries(
+            client, {'username': 'regular', 'email': 'regular@yamdb.fake'}
+        )
+        assert len(queries) == 2, (
+            'Проверьте, что повторный запрос кода выполняет один SELECT '
+            'пользователя и постановку письма в очередь.'
+        )
+        assert not any('INSERT INTO "users_user"' in sql for sql in queries)
+
+    def test_03_conflicts_use_single_query(self, client, django_user_model):
+        django_user_model.objects.create_user(
+            username='regular', email='regular@yamdb.fake'
+        )
+        for data in (
+            {'username': 'regular', 'email': 'other@yamdb.fake'},
+            {'username': 'other', 'email': 'regular@yamdb.fake'},
+        ):
+            queries = signup_queries(client, data, HTTPStatus.BAD_REQUEST)
+            assert len(queries) == 1
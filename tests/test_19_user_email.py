@@ -0,0 +1,39 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19UserEmail:
+
+    def test_01_own_email_is_not_taken(self, user_client, user):
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'email': user.email, 'bio': 'Новое'}
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что PATCH-запрос к `/api/v1/users/me/` со своим '
+            'же email не считается занятым email.'
+        )
+
+    def test_02_taken_email_rejected(self, admin_client, admin, user):
+        url = f'/api/v1/users/{user.username}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(url, data={'email': admin.email})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'email' in response.json()
+        assert not any(
+            query['sql'].startswith('SELECT "users_user"."email" FROM')
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что проверка email не загружает email '
+            'всех пользователей.'
+        )
+
+    def test_03_unique_constraint(self, django_user_model, user):
+        django_user_model.objects.create(username='first', email='')
+        django_user_model.objects.create(username='second', email='')
+        with pytest.raises(IntegrityError):
+            django_user_model.objects.create(username='copy',
+                                             email=user.email)
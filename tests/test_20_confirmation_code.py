@@ -0,0 +1,88 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+DATA = {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+
+
+def request_code(client):
+    response = client.post(SIGNUP_URL, data=DATA)
+    assert response.status_code == HTTPStatus.OK
+    return re.search(r'code is: (\S+)', mail.outbox[-1].body).group(1)
+
+
+def exchange(client, code):
+    return client.post(TOKEN_URL, data={
+        'username': DATA['username'], 'confirmation_code': code
+    })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ConfirmationCode:
+
+    def test_01_stateless_code_is_single_use(self, client):
+        code = request_code(client)
+        with CaptureQueriesContext(connection) as context:
+            response = exchange(client, code)
+        assert response.status_code == HTTPStatus.CREATED
+        assert 'token' in response.json()
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1 and '"confirmation_code"' not in updates[0], (
+            'Проверьте, что обмен кода на токен обновляет только '
+            '`last_login`, а не всю строку пользователя.'
+        )
+        assert exchange(client, code).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения нельзя использовать повторно.'
+        )
+        assert exchange(client, request_code(client)).status_code == (
+            HTTPStatus.CREATED
+        )
+
+    def test_02_code_expires(self, client, settings):
+        code = request_code(client)
+        settings.CONFIRMATION_CODE = {
+            **settings.CONFIRMATION_CODE, 'TIMEOUT': -1
+        }
+        assert exchange(client, code).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения ограничен по времени.'
+        )
+
+    def test_03_password_reset_token_rejected(self, client):
+        from django.contrib.auth.tokens import default_token_generator
+
+        from users.models import User
+
+        request_code(client)
+        user = User.objects.get(username=DATA['username'])
+        token = default_token_generator.make_token(user)
+        assert exchange(client, token).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_stored_mode(self, client, settings):
+        from users.models import User
+        from users.tokens import code_digest
+
+        settings.CONFIRMATION_CODE = {
+            **settings.CONFIRMATION_CODE, 'MODE': 'stored'
+        }
+        code = request_code(client)
+        user = User.objects.filter(username=DATA['username'])
+        stored = user.get().confirmation_code
+        max_length = User._meta.get_field('confirmation_code').max_length
+        assert stored == code_digest(code) and len(stored) <= max_length, (
+            "Проверьте, что в режиме 'stored' в БД сохраняется отпечаток "
+            'кода, который помещается в поле `confirmation_code`.'
+        )
+        user.update(confirmation_code=None)
+        assert exchange(client, code).status_code == HTTPStatus.BAD_REQUEST, (
+            "Проверьте, что в режиме 'stored' код можно отозвать в БД."
+        )
+        code = request_code(client)
+        assert exchange(client, code).status_code == HTTPStatus.CREATED
+        assert user.get().confirmation_code is None
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+ME_URL = '/api/v1/users/me/'
+
+
+def user_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    queries = [query['sql'] for query in context.captured_queries
+               if 'FROM "users_user"' in query['sql']]
+    return response, queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21CachedAuthentication:
+
+    def test_01_user_loaded_once(self, user_client, user):
+        response, queries = user_queries(user_client, 'get', ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 1
+        response, queries = user_queries(user_client, 'get', ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+        assert queries == [], (
+            'Проверьте, что аутентифицированный запрос не читает '
+            'пользователя из БД, пока он есть в кэше.'
+        )
+
+    def test_02_role_change_invalidates(self, user_client, admin_client,
+                                        user):
+        url = '/api/v1/users/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.patch(f'{url}{user.username}/',
+                                      data={'role': 'admin'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что смена роли сбрасывает пользователя в кэше '
+            'аутентификации.'
+        )
+
+    def test_03_inactive_user_rejected(self, user_client, user):
+        assert user_client.get(ME_URL).status_code == HTTPStatus.OK
+        user.is_active = False
+        user.save()
+        assert user_client.get(ME_URL).status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_me_patch_keeps_fresh_fields(self, user_client, user,
+                                            django_user_model):
+        assert user_client.get(ME_URL).status_code == HTTPStatus.OK
+        django_user_model.objects.filter(pk=user.pk).update(bio='Из БД')
+        response = user_client.patch(ME_URL, data={'first_name': 'Имя'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert (user.first_name, user.bio) == ('Имя', 'Из БД'), (
+            'Проверьте, что PATCH-запрос к `/api/v1/users/me/` не '
+            'записывает в БД устаревшие поля из кэша.'
+        )
+
+    def test_05_cache_disabled(self, user_client, settings):
+        settings.SIMPLE_JWT = {**settings.SIMPLE_JWT, 'USER_CACHE_TTL': 0}
+        for _ in range(2):
+            response, queries = user_queries(user_client, 'get', ME_URL)
+            assert len(queries) == 1
@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.fixture(autouse=True)
+def role_claims(settings, tmp_path):
+    # Версии утверждений должны быть в общем для процессов кэше.
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    settings.SIMPLE_JWT = {**settings.SIMPLE_JWT, 'ROLE_CLAIMS': True}
+
+
+def claims_client(user):
+    from users.authentication import user_cache, user_cache_key
+    from users.tokens import access_token_for
+
+    token = access_token_for(user)
+    # Пользователь не должен браться и из кэша аутентификации.
+    user_cache().delete(user_cache_key(user.pk))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, token
+
+
+def user_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    queries = [query['sql'] for query in context.captured_queries
+               if 'FROM "users_user"' in query['sql']]
+    return response, queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22RoleClaims:
+
+    def test_01_token_carries_role(self, client, user):
+        from users.tokens import issue_code
+
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': issue_code(user),
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        token = AccessToken(response.json()['token'])
+        assert (token['role'], token['is_superuser']) == ('user', False), (
+            'Проверьте, что токен доступа содержит роль пользователя.'
+        )
+
+    def test_02_permissions_without_user_queries(self, admin, user):
+        admin_client, _ = claims_client(admin)
+        response, queries = user_queries(
+            admin_client, 'post', '/api/v1/categories/',
+            data={'name': 'Фильм', 'slug': 'film'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert queries == [], (
+            'Проверьте, что права администратора из токена с ролью '
+            'проверяются без чтения пользователя из БД.'
+        )
+        user_client, _ = claims_client(user)
+        response, queries = user_queries(user_client, 'get',
+                                         '/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert queries == []
+
+    def test_03_review_author_from_claims(self, admin, user):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        user_client, _ = claims_client(user)
+        response = user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                                    data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        assert Review.objects.get().author == user
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+
+    def test_04_role_change_revokes_token(self, admin_client, user):
+        user_client, _ = claims_client(user)
+        assert user_client.get('/api/v1/users/').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'role': 'admin'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get('/api/v1/users/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что смена роли отзывает токены с прежней ролью.'
+        user.refresh_from_db()
+        new_client, _ = claims_client(user)
+        assert new_client.get('/api/v1/users/').status_code == HTTPStatus.OK
+
+    def test_05_unchanged_user_keeps_token(self, user):
+        from users.authentication import claims_version_key, user_cache
+
+        user_client, _ = claims_client(user)
+        user.bio = 'Новая биография'
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        user_cache().delete(claims_version_key(user.pk))
+        response, queries = user_queries(user_client, 'get',
+                                         '/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что токен с ролью, совпадающей с БД, принимается '
+            'и после вытеснения версии из кэша.'
+        )
+        assert queries
+
+    def test_06_claims_disabled(self, user, settings):
+        settings.SIMPLE_JWT = {**settings.SIMPLE_JWT, 'ROLE_CLAIMS': False}
+        _, token = claims_client(user)
+        assert 'role' not in token
+
+    def test_07_access_token_lifetime(self, user, settings):
+        _, token = claims_client(user)
+        assert token['exp'] - token['iat'] == (
+            settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        ), (
+            'Проверьте, что токен с ролью живёт ACCESS_TOKEN_LIFETIME: '
+            'без эндпоинта обновления короткий срок заставлял бы '
+            'запрашивать код подтверждения заново.'
+        )
+
+    def test_08_process_local_cache_rejected(self, user, settings):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from users.tokens import access_token_for
+
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with pytest.raises(ImproperlyConfigured):
+            access_token_for(user)
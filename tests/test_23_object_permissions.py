@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def review_with_comment(user):
+    from reviews.models import Comment, Review, Title
+    from reviews.ratings import update_title_rating
+
+    title = Title.objects.create(name='Произведение', year=2000)
+    review = Review.objects.create(title=title, author=user, text='Отзыв',
+                                   score=5)
+    update_title_rating(title.id, 5, 1)
+    comment = Comment.objects.create(review=review, author=user,
+                                     text='Комментарий')
+    return review, comment
+
+
+def captured(client, method, url, data=None):
+    # Первый запрос кладёт пользователя в кэш аутентификации.
+    client.get('/api/v1/users/me/')
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ObjectPermissions:
+
+    @pytest.mark.parametrize('editor, data, expected', (
+        ('user_client', {'score': 3}, 5),
+        ('moderator_client', {'text': 'Правка'}, 2),
+    ))
+    def test_01_review_patch_queries(self, request, review_with_comment,
+                                     editor, data, expected):
+        review, _ = review_with_comment
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        response, queries = captured(request.getfixturevalue(editor),
+                                     'patch', url, data)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == review.author.username
+        assert len(queries) == expected, (
+            f'Проверьте, что PATCH-запрос к `{url}` читает отзыв одним '
+            'запросом вместе с username автора, без отдельной проверки '
+            'произведения.'
+        )
+        assert not any('"users_user"."password"' in sql for sql in queries)
+
+    def test_02_comment_queries(self, user_client, moderator_client,
+                                review_with_comment):
+        review, comment = review_with_comment
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+               f'comments/{comment.id}/')
+        response, queries = captured(user_client, 'patch', url,
+                                     {'text': 'Правка'})
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 2
+        response, queries = captured(moderator_client, 'delete', url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        # С обработчиками post_delete удаление идёт в транзакции.
+        queries = [sql for sql in queries if sql != 'BEGIN']
+        assert len(queries) == 2
+        assert 'users_user' not in queries[0], (
+            'Проверьте, что для удаления комментария автор не загружается '
+            'из БД: права проверяются по `author_id`.'
+        )
+
+    def test_03_foreign_object_forbidden(self, admin, review_with_comment,
+                                         user_client):
+        from reviews.models import Review
+
+        review, _ = review_with_comment
+        other = Review.objects.create(title=review.title, author=admin,
+                                      text='Чужой', score=1)
+        url = f'/api/v1/titles/{review.title_id}/reviews/{other.id}/'
+        assert user_client.patch(url, data={'text': 'x'}).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        assert user_client.delete(url).status_code == HTTPStatus.FORBIDDEN
+        wrong_title = f'/api/v1/titles/{review.title_id + 1}/reviews/'
+        assert user_client.patch(
+            f'{wrong_title}{review.id}/', data={'text': 'x'}
+        ).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,35 @@
+import pytest
+from django.db import connection
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite',
+                    reason='Формат плана зависит от СУБД.')
+@pytest.mark.django_db
+class Test24Indexes:
+
+    @pytest.mark.parametrize('filters, index', (
+        ({'category__slug': 'film', 'year': 2000}, 'title_category_feed_idx'),
+        ({'year': 2000}, 'title_year_feed_idx'),
+    ))
+    def test_01_title_filters_use_index(self, filters, index):
+        from reviews.models import Title
+
+        result = Title.objects.filter(**filters).order_by('-id').explain()
+        assert index in result, (
+            f'Проверьте, что фильтр произведений {filters} с сортировкой '
+            f'по `-id` использует индекс `{index}`.'
+        )
+        assert 'TEMP B-TREE' not in result
+
+    @pytest.mark.parametrize('model, field, index', (
+        ('Review', 'title_id', 'review_title_feed_idx'),
+        ('Comment', 'review_id', 'comment_review_feed_idx'),
+    ))
+    def test_02_feeds_use_index(self, model, field, index):
+        from reviews import models
+
+        queryset = getattr(models, model).objects.filter(
+            **{field: 1}
+        ).order_by('-pub_date', '-id')
+        result = queryset.explain()
+        assert index in result and 'TEMP B-TREE' not in result
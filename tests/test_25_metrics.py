@@ -0,0 +1,115 @@
+import asyncio
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+METRICS_URL = '/metrics/'
+
+
+@pytest.fixture(autouse=True)
+def metrics_endpoint(settings):
+    settings.API_METRICS = {**settings.API_METRICS, 'ENDPOINT': True}
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    from api.metrics import registry
+
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def server_timing(response):
+    return dict(
+        (name, params) for name, params in re.findall(
+            r'(\w+);([^,]*)', response['Server-Timing']
+        )
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Metrics:
+
+    def test_01_server_timing(self, client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Произведение', year=2000)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        timing = server_timing(response)
+        assert set(timing) == {'db', 'serializer', 'total'}, (
+            'Проверьте, что ответ API содержит заголовок Server-Timing '
+            'со временем SQL, сериализации и всего запроса.'
+        )
+        queries = len(context.captured_queries)
+        assert f'desc="{queries} queries"' in timing['db']
+
+    def test_02_prometheus_endpoint(self, client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/')
+        client.get(f'/api/v1/titles/{title.id}/reviews/')
+        response = client.get(METRICS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        for route in ('title-list', 'title-detail', 'reviews-list'):
+            assert (f'yamdb_http_requests_total{{route="{route}",'
+                    f'method="GET",status="200"}} 1') in text, (
+                f'Проверьте, что {METRICS_URL} считает запросы '
+                f'по маршруту `{route}`.'
+            )
+        assert re.search(
+            r'yamdb_http_request_queries_total\{route="title-list",'
+            r'method="GET"\} [1-9]', text
+        )
+        assert ('yamdb_http_request_duration_seconds_count'
+                '{route="title-list",method="GET"} 1') in text
+        assert 'yamdb_response_cache_requests_total{cache="reviews",' in text
+        assert 'yamdb_email_outbox_queued 0' in text
+
+    def test_03_endpoint_restricted(self, client, settings):
+        settings.API_METRICS = {**settings.API_METRICS, 'TOKEN': 'secret'}
+        assert client.get(METRICS_URL).status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что с API_METRICS[\'TOKEN\'] {METRICS_URL} '
+            'недоступен без токена, в том числе с 127.0.0.1.'
+        )
+        response = client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == HTTPStatus.OK
+        settings.API_METRICS = {**settings.API_METRICS, 'ENDPOINT': False}
+        response = client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_disabled(self, client, settings):
+        settings.API_METRICS = {**settings.API_METRICS, 'ENABLED': False}
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response
+        from api.metrics import registry
+
+        assert registry.routes == {}
+
+    def test_05_async_middleware(self, rf):
+        from asgiref.sync import async_to_sync
+        from django.http import HttpResponse
+
+        from api.metrics import MetricsMiddleware
+
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(get_response)
+        assert asyncio.iscoroutinefunction(middleware), (
+            'Проверьте, что под ASGI MetricsMiddleware работает '
+            'асинхронно и не переводит запросы в общий синхронный поток.'
+        )
+        response = async_to_sync(middleware)(rf.get('/api/v1/titles/'))
+        assert 'total;dur=' in response['Server-Timing']
@@ -0,0 +1,67 @@
+import json
+import logging
+from http import HTTPStatus
+from logging.handlers import RotatingFileHandler
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def slow_log(tmp_path, settings):
+    settings.SLOW_QUERY_LOG = {**settings.SLOW_QUERY_LOG, 'THRESHOLD': 0}
+    path = tmp_path / 'slow_queries.jsonl'
+    logger = logging.getLogger('api.slow_queries')
+    handlers = logger.handlers
+    handler = RotatingFileHandler(path, maxBytes=2000, backupCount=3,
+                                  encoding='utf-8')
+    logger.handlers = [handler]
+    yield path
+    handler.close()
+    logger.handlers = handlers
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as lines:
+        return [json.loads(line) for line in lines]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26SlowQueries:
+
+    def test_01_query_attributed_to_view(self, client, slow_log):
+        response = client.get('/api/v1/titles/?year=2000&name=Фильм')
+        assert response.status_code == HTTPStatus.OK
+        entries = [entry for entry in read_log(slow_log)
+                   if entry.get('view') == 'TitleViewSet']
+        assert entries, (
+            'Проверьте, что медленные SQL-запросы записываются в журнал '
+            'вместе с view, которое их выполнило.'
+        )
+        entry = entries[-1]
+        assert entry['action'] == 'list'
+        assert entry['route'] == 'title-list'
+        assert entry['query'] == {'year': '2000', 'name': 'Фильм'}
+        assert entry['sql'].startswith('SELECT')
+        assert 'params' not in entry
+
+    def test_02_threshold(self, client, slow_log, settings):
+        settings.SLOW_QUERY_LOG = {**settings.SLOW_QUERY_LOG,
+                                   'THRESHOLD': 60}
+        client.get('/api/v1/titles/')
+        assert not slow_log.exists() or read_log(slow_log) == []
+
+    def test_03_report(self, client, slow_log, capsys):
+        for _ in range(5):
+            client.get('/api/v1/titles/?year=2000')
+            client.get('/api/v1/genres/')
+        assert slow_log.with_name('slow_queries.jsonl.1').exists(), (
+            'Проверьте, что журнал медленных запросов ротируется.'
+        )
+        call_command('slowqueries', file=str(slow_log), top=3, by='view')
+        output = capsys.readouterr().out
+        assert '1. ' in output and '4. ' not in output
+        assert 'TitleViewSet.list' in output
+        assert '?year=2000' in output
+        call_command('slowqueries', file=str(slow_log))
+        assert 'SELECT' in capsys.readouterr().out
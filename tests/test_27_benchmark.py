@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def test_01_zipf_counts():
+    from reviews.synthetic import zipf_counts
+
+    counts = zipf_counts(1000, 100, 1.1)
+    assert sum(counts) == 1000
+    assert counts[0] == max(counts)
+    assert counts[0] > 10 * counts[-1], (
+        'Проверьте, что распределение отзывов по произведениям '
+        'сильно перекошено в пользу популярных.'
+    )
+    assert max(zipf_counts(1000, 100, 1.1, limit=50)) == 50
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Benchmark:
+
+    def test_02_generate(self):
+        from reviews.models import Comment, Review, Title
+        from reviews.synthetic import generate
+
+        dataset = generate(users=20, titles=30, genres=5, categories=3,
+                           reviews=200, comments=100)
+        assert Title.objects.count() == 30
+        assert Review.objects.count() == 200
+        assert Comment.objects.count() == 100
+        top = dataset.titles[0]
+        assert top.reviews.count() == 20
+        top.refresh_from_db()
+        assert top.review_count == 20 and top.rating is not None
+
+    def test_03_command_json(self, tmp_path):
+        from reviews.models import Comment, Title
+        from users.models import User
+
+        output = tmp_path / 'result.json'
+        options = {
+            'users': 10, 'titles': 20, 'genres': 3, 'categories': 2,
+            'reviews': 60, 'comments': 30, 'requests': 3, 'warmup': 1,
+            'scenario': ['reviews-list', 'comment-create'],
+        }
+        User.objects.create(username='synthetic-1', email='s@yamdb.fake')
+        call_command('apibenchmark', output=str(output), current_db=True,
+                     **options)
+        assert not Title.objects.exists() and not Comment.objects.exists()
+        assert list(User.objects.values_list('username', flat=True)) == [
+            'synthetic-1'
+        ], (
+            'Проверьте, что `apibenchmark --current-db` удаляет после '
+            'замера только синтетические данные.'
+        )
+        result = json.loads(output.read_text(encoding='utf-8'))
+        assert set(result['scenarios']) == {'reviews-list', 'comment-create'}
+        for stats in result['scenarios'].values():
+            assert stats['errors'] == 0
+            assert stats['requests'] == 3
+            assert {'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request',
+                    'rps'} <= set(stats)
+        for stats in result['scenarios'].values():
+            stats['queries_per_request'] = 0
+        output.write_text(json.dumps(result), encoding='utf-8')
+        with pytest.raises(CommandError):
+            call_command('apibenchmark', output=str(tmp_path / 'new.json'),
+                         baseline=str(output), current_db=True, **options)
+
+
+def test_04_throwaway_database(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    database = tmp_path / 'db.sqlite3'
+    output = tmp_path / 'result.json'
+    subprocess.run(
+        [sys.executable, 'manage.py', 'apibenchmark', '--users', '5',
+         '--titles', '5', '--reviews', '10', '--comments', '5',
+         '--requests', '2', '--warmup', '0', '--scenario', 'title-detail',
+         '--output', str(output)],
+        cwd=Path(__file__).resolve().parent.parent / 'api_yamdb',
+        env={**os.environ, 'DB_NAME': str(database)},
+        check=True,
+    )
+    result = json.loads(output.read_text(encoding='utf-8'))
+    assert result['scenarios']['title-detail']['errors'] == 0
+    assert not database.exists(), (
+        'Проверьте, что `apibenchmark` без --current-db не обращается '
+        'к настроенной БД, а создаёт временную.'
+    )
@@ -0,0 +1,85 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+
+def test_01_sqlite_by_default():
+    from api_yamdb.db import database_settings
+
+    database = database_settings({}, Path('/app'))
+    assert database['ENGINE'] == 'django.db.backends.sqlite3'
+    assert database['NAME'] == Path('/app/db.sqlite3')
+    assert database['CONN_MAX_AGE'] == 0
+
+
+def test_02_postgresql_profile():
+    from api_yamdb.db import database_settings
+
+    database = database_settings({
+        'DB_ENGINE': 'django.db.backends.postgresql',
+        'DB_NAME': 'yamdb',
+        'POSTGRES_USER': 'yamdb',
+        'POSTGRES_PASSWORD': 'secret',
+        'DB_HOST': 'db',
+    }, Path('/app'))
+    assert database['NAME'] == 'yamdb' and database['HOST'] == 'db'
+    assert database['PORT'] == '5432'
+    assert database['CONN_MAX_AGE'] == 60, (
+        'Проверьте, что для PostgreSQL соединения по умолчанию постоянные.'
+    )
+    assert database['CONN_HEALTH_CHECKS'] is True
+    assert database['DISABLE_SERVER_SIDE_CURSORS'] is False
+
+
+def test_03_pgbouncer():
+    from api_yamdb.db import database_settings
+
+    environ = {
+        'DB_ENGINE': 'django.db.backends.postgresql',
+        'DB_POOLER': 'pgbouncer',
+        'DB_CONN_MAX_AGE': '300',
+        'DB_CONN_HEALTH_CHECKS': 'false',
+    }
+    database = database_settings(environ, Path('/app'))
+    assert database['PORT'] == '6432'
+    assert database['CONN_MAX_AGE'] == 300
+    assert database['CONN_HEALTH_CHECKS'] is False
+    assert database['DISABLE_SERVER_SIDE_CURSORS'] is True
+    with pytest.raises(ValueError):
+        database_settings({**environ, 'DB_POOLER': 'pgpool'}, Path('/app'))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Connections:
+
+    def test_04_health_check(self, client, monkeypatch):
+        from django.db import connection
+
+        connection.ensure_connection()
+        closed = []
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        monkeypatch.setitem(connection.settings_dict,
+                            'CONN_HEALTH_CHECKS', False)
+        client.get('/api/v1/titles/')
+        assert closed == []
+        monkeypatch.setitem(connection.settings_dict,
+                            'CONN_HEALTH_CHECKS', True)
+        client.get('/api/v1/titles/')
+        assert closed, (
+            'Проверьте, что неработающее постоянное соединение '
+            'закрывается в начале запроса.'
+        )
+
+    def test_05_benchmark_command(self):
+        from django.db import connection
+
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        out = StringIO()
+        call_command('connectionbenchmark', requests=3, warmup=1, stdout=out)
+        output = out.getvalue()
+        assert 'Новое соединение на запрос' in output
+        assert 'Постоянные соединения: соединений 0 на 3 запросов' in output
+        assert connection.settings_dict['CONN_MAX_AGE'] == max_age